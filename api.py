@@ -0,0 +1,95 @@
+# api.py - HTTP API for the Sahaj Tax pipeline
+# Exposes pipeline.py (compute, audit, file) over HTTP so the Streamlit app,
+# batch jobs and other services share one backend.
+#
+# Run:   uvicorn api:app --host 127.0.0.1 --port 8000 --workers 4
+# Every route except /health requires the X-API-Key header when SAHAJ_API_KEY is set
+# (api_client.py sends it). Without a key the API is unauthenticated: keep it on
+# localhost, and only bind a public interface (--host 0.0.0.0) with SAHAJ_API_KEY set.
+# Requests share no session state and /file saves each record straight to
+# MongoDB (not through the write-behind spill file, which belongs to a single
+# process), so several workers or machines behind a load balancer are safe.
+from typing import Optional
+import hmac
+import json
+import os
+from fastapi import Depends, FastAPI, HTTPException, Security
+from fastapi.security import APIKeyHeader
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from models import TaxPayer
+from auditor import audit_tax_return
+from pipeline import compute_taxes, build_summary, build_record, process_return
+from metrics import render_prometheus
+from peer_stats import get_peer_stats
+
+API_KEY = os.environ.get("SAHAJ_API_KEY", "")
+
+app = FastAPI(title="Sahaj Tax AI", version="1.0")
+
+_api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+def require_api_key(key: Optional[str] = Security(_api_key_header)):
+    """Rejects requests without the right X-API-Key (no-op when SAHAJ_API_KEY is not set)"""
+    if API_KEY and not hmac.compare_digest((key or "").encode("utf-8"), API_KEY.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+
+_protected = [Depends(require_api_key)]
+
+class AuditRequest(BaseModel):
+    taxpayer: TaxPayer
+    summary: Optional[dict] = None  # Computed from the taxpayer if not given
+
+# Endpoints are async; anything that can wait on I/O (the peer snapshot, MongoDB)
+# runs in the thread pool so it never blocks the event loop.
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=_protected)
+async def metrics():
+    """Stage latencies and counters in the Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.post("/compute", dependencies=_protected)
+async def compute(taxpayer: TaxPayer, assessment_year: Optional[str] = None):
+    """Both regimes, the recommendation and the tax summary (pure calculation, no I/O)"""
+    tax_new, tax_old, best_regime, final_tax = compute_taxes(taxpayer, assessment_year)
+    return {
+        "tax_new": tax_new, "tax_old": tax_old, "best_regime": best_regime, "final_tax": final_tax,
+        "summary": build_summary(taxpayer, best_regime, final_tax, assessment_year),
+    }
+
+def _audit(request, assessment_year):
+    summary = request.summary
+    if summary is None:
+        _, _, best_regime, final_tax = compute_taxes(request.taxpayer, assessment_year)
+        summary = build_summary(request.taxpayer, best_regime, final_tax, assessment_year)
+    return audit_tax_return(request.taxpayer, summary, get_peer_stats())
+
+@app.post("/audit", dependencies=_protected)
+async def audit(request: AuditRequest, assessment_year: Optional[str] = None):
+    """Compliance report for a return"""
+    return await run_in_threadpool(_audit, request, assessment_year)
+
+def _file(taxpayer, assessment_year, save):
+    result = process_return(taxpayer, assessment_year, peer_stats=get_peer_stats())
+    result["saved"] = False
+    if result["can_file"] and save:
+        from database import save_tax_record  # Only API workers that file returns need the DB stack
+        try:
+            result["saved"] = save_tax_record(build_record(taxpayer, result["best_regime"], result["final_tax"]))
+        except Exception as e:
+            print(f"Database Warning: {e}")  # The return is still valid; "saved": false tells the caller
+    result["itr"] = json.loads(result.pop("itr_json")) if result["itr_json"] else None
+    return result
+
+@app.post("/file", dependencies=_protected)
+async def file_return(taxpayer: TaxPayer, assessment_year: Optional[str] = None, save: bool = True):
+    """
+    The whole "Process Application" flow: compute, audit, ITR JSON and save.
+    The ITR payload is returned as JSON (null if the audit blocks the return).
+    """
+    return await run_in_threadpool(_file, taxpayer, assessment_year, save)
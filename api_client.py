@@ -0,0 +1,56 @@
+# api_client.py - Thin client used by the Streamlit app
+# If SAHAJ_API_URL is set (e.g. http://localhost:8000), returns are processed by
+# the HTTP API in api.py. Otherwise the same pipeline runs in-process, so the
+# app still works stand-alone. SAHAJ_API_KEY is sent as X-API-Key (see api.py).
+import json
+import os
+from pipeline import process_return, build_record
+from metrics import span
+
+API_URL = os.environ.get("SAHAJ_API_URL", "").rstrip("/")
+API_KEY = os.environ.get("SAHAJ_API_KEY", "")
+API_TIMEOUT = 30  # Seconds
+
+_session = None
+
+def _get_session():
+    """One HTTP session per process, so connections are kept alive between reruns"""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+        if API_KEY:
+            _session.headers["X-API-Key"] = API_KEY
+    return _session
+
+def file_return(user, assessment_year=None, save=True):
+    """
+    Compute + audit + ITR JSON (+ save) for one TaxPayer.
+    Returns the pipeline result (see pipeline.process_return) with an extra "saved" flag.
+    """
+    if API_URL:
+        params = {"save": save}
+        if assessment_year:
+            params["assessment_year"] = assessment_year
+        with span("api_client.request"):
+            response = _get_session().post(f"{API_URL}/file", json=user.model_dump(), params=params, timeout=API_TIMEOUT)
+        if response.status_code == 422:
+            raise ValueError(f"Invalid taxpayer data: {response.json()['detail']}")
+        response.raise_for_status()
+        result = response.json()
+        # Same text as filing.generate_govt_json produces locally
+        result["itr_json"] = json.dumps(result.pop("itr"), indent=4) if result["itr"] else None
+        return result
+
+    from peer_stats import get_peer_stats
+    result = process_return(user, assessment_year, peer_stats=get_peer_stats())
+    result["saved"] = False
+    if result["can_file"] and save:
+        # Safe Mode: a DB problem must never fail the return itself
+        try:
+            from write_behind import queue_tax_record
+            with span("app.save"):
+                result["saved"] = queue_tax_record(build_record(user, result["best_regime"], result["final_tax"]))
+        except Exception as db_err:
+            print(f"Database Warning: {db_err}")
+    return result
@@ -1,22 +1,68 @@
 # app.py - Sahaj Tax AI (Crash-Proof Edition)
 import streamlit as st
-import pandas as pd
-import time
+import os
+import tempfile
+from datetime import datetime, timedelta
 
 # --- IMPORTS ---
+# Only what the login screen needs. The OCR (pytesseract), ML (scikit-learn),
+# database (pymongo) and pandas stacks are loaded by the LAZY LOADERS below.
 try:
     from auth import login_screen, logout_button
-    from local_ai import ai_extract_data
-    from tax_brain import get_custom_response
     from models import TaxPayer
-    from calculator import calculate_new_regime, calculate_old_regime
-    from database import save_tax_record, get_all_records
-    from auditor import audit_tax_return
-    from filing import generate_govt_json
+    from metrics import span, snapshot as metrics_snapshot
 except ImportError as e:
     st.error(f"❌ System Error: Missing File. {e}")
     st.stop()
 
+# --- LAZY LOADERS ---
+# Each heavy stack is imported the first time its feature is used, then kept
+# as a resource for every later rerun and session (see benchmarks/startup.py).
+@st.cache_resource(show_spinner="Loading OCR engine...")
+def load_ocr():
+    from local_ai import ai_extract_data
+    return ai_extract_data
+
+@st.cache_resource(show_spinner="Loading AI Sahayak...")
+def load_sahayak():
+    import tax_brain
+    tax_brain.get_index()  # Load / fit the index now, not on the first question
+    return tax_brain.get_custom_response
+
+@st.cache_resource(show_spinner=False)
+def load_filing():
+    from api_client import file_return
+    from optimizer import optimize_deductions
+    return file_return, optimize_deductions
+
+@st.cache_resource(show_spinner=False)
+def load_whatif():
+    import whatif
+    return whatif
+
+@st.cache_resource(show_spinner="Connecting to the records database...")
+def load_records():
+    import database
+    return database
+
+# The dashboard KPIs scan every filtered record, so one result is reused for this long
+# (per filter combination) instead of re-running the aggregation on every admin rerun
+DASHBOARD_STATS_TTL = int(os.environ.get("SAHAJ_DASHBOARD_STATS_TTL", "60"))  # Seconds
+
+@st.cache_data(ttl=DASHBOARD_STATS_TTL, show_spinner=False)
+def load_dashboard_stats(pan, status, date_from, date_to):
+    return load_records().get_dashboard_stats(pan, status, date_from, date_to)
+
+# Columns shown in the admin Tax Records table (everything else stays in MongoDB)
+RECORD_FIELDS = ["name", "pan", "status", "income", "tax", "created_at"]
+
+# Filing wizard inputs (session state key -> default)
+FORM_DEFAULTS = {"form_name": "Itishree Khadiratna", "form_pan": "ABCDE1234F", "form_interest": 0.0,
+                 "form_salary": 1200000.0, "form_80c": 150000.0, "form_age": 25, "form_80d": 0.0}
+# Form 16 field (see field_extractor.py) -> wizard input it prefills
+FORM16_FIELDS = {"salary_income": "form_salary", "interest_income": "form_interest",
+                 "section_80c_deductions": "form_80c", "section_80d_deductions": "form_80d"}
+
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
     page_title="Sahaj Tax AI | Govt of India", 
@@ -122,53 +168,96 @@ else:
     with tab1:
         st.markdown('<div class="service-card">', unsafe_allow_html=True)
         st.markdown("#### 📄 New ITR Application")
+
+        # Form defaults (kept in session state so a Form 16 upload can prefill them)
+        for key, default in FORM_DEFAULTS.items():
+            if key not in st.session_state: st.session_state[key] = default
+
+        # Optional: read Form 16 and prefill the form
+        form16 = st.file_uploader("📎 Upload Form 16 to prefill (image or PDF)", type=["png", "jpg", "jpeg", "pdf"])
+        if form16 is not None and st.session_state.get("form16_id") != form16.file_id:
+            st.session_state["form16_id"] = form16.file_id
+            with st.spinner("🔍 Reading Form 16..."):
+                suffix = os.path.splitext(form16.name)[1]
+                with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+                    tmp.write(form16.getvalue())
+                try:
+                    extracted = load_ocr()(tmp.name)
+                finally:
+                    os.remove(tmp.name)
+            if extracted.get("error"):
+                st.warning(f"Could not read Form 16: {extracted['error']}")
+            else:
+                if extracted.get("pan"): st.session_state["form_pan"] = extracted["pan"]
+                for field, key in FORM16_FIELDS.items():
+                    if field in extracted.get("fields", {}): st.session_state[key] = float(extracted["fields"][field])
+                st.success(f"✅ Prefilled {len(extracted.get('fields', {})) + bool(extracted.get('pan'))} fields from Form 16. Please verify.")
         
         # Form
         c1, c2, c3 = st.columns(3)
         with c1:
-            name_in = st.text_input("Full Name", value="Itishree Khadiratna")
-            pan_in = st.text_input("PAN Number", value="ABCDE1234F")
+            name_in = st.text_input("Full Name", key="form_name")
+            pan_in = st.text_input("PAN Number", key="form_pan")
+            interest_in = st.number_input("Interest Income (₹)", key="form_interest")
         with c2:
-            income_in = st.number_input("Gross Annual Salary (₹)", value=1200000.0)
-            inv_in = st.number_input("80C Deductions (₹)", value=150000.0)
+            income_in = st.number_input("Gross Annual Salary (₹)", key="form_salary")
+            inv_in = st.number_input("80C Deductions (₹)", key="form_80c")
         with c3:
-            age_in = st.number_input("Age", value=25)
-            med_in = st.number_input("Health Insurance (₹)", value=0.0)
+            age_in = st.number_input("Age", key="form_age")
+            med_in = st.number_input("Health Insurance (₹)", key="form_80d")
+
+        # WHAT-IF EXPLORER (updates live as the inputs change; answers are cached, see whatif.py)
+        if st.toggle("📈 What-if Explorer", key="whatif_on"):
+            whatif = load_whatif()
+            # Not validated here: the PAN may still be half-typed
+            scenario = TaxPayer.model_construct(name=name_in, pan_number=pan_in, age=int(age_in), salary_income=income_in,
+                                                interest_income=interest_in, section_80c_deductions=inv_in,
+                                                section_80d_deductions=med_in)
+            live = whatif.evaluate_scenario(scenario)
+            w1, w2, w3 = st.columns(3)
+            w1.metric("Tax (New)", f"₹ {live['tax_new']:,.0f}")
+            w2.metric("Tax (Old)", f"₹ {live['tax_old']:,.0f}")
+            w3.metric("Best possible", f"₹ {live['optimized_tax']:,.0f}", help=f"{live['optimized_regime']} Regime with the optimal 80C / 80D plan")
+            vary = st.selectbox("Vary", list(whatif.CURVE_FIELDS), format_func=whatif.CURVE_FIELDS.get, key="whatif_field")
+            st.line_chart(whatif.tax_curve(scenario, vary))
 
         st.markdown("<br>", unsafe_allow_html=True)
         
         # ACTION BUTTON
         if st.button("🚀 Process Application", type="primary", use_container_width=True):
-            with st.spinner("🔄 AI Agent is processing..."):
-                time.sleep(1) # Visual delay
+            with st.spinner("🔄 AI Agent is processing..."), span("app.process"):
                 try:
                     # 1. Calculation Logic
-                    user = TaxPayer(name=name_in, pan_number=pan_in, age=age_in, salary_income=income_in, 
-                                    section_80c_deductions=inv_in, section_80d_deductions=med_in)
+                    with span("app.validate"):
+                        user = TaxPayer(name=name_in, pan_number=pan_in, age=age_in, salary_income=income_in, 
+                                        interest_income=interest_in,
+                                        section_80c_deductions=inv_in, section_80d_deductions=med_in)
                     
-                    tax_new = calculate_new_regime(user)
-                    tax_old = calculate_old_regime(user)
-                    best_regime = "New" if tax_new < tax_old else "Old"
-                    final_tax = min(tax_new, tax_old)
-                    
-                    summary = {
-                        "selected_regime": best_regime, "better_regime": best_regime,
-                        "taxable_income": max(0, income_in - inv_in) if best_regime == "Old" else income_in - 75000,
-                        "total_deductions": inv_in if best_regime == "Old" else 0,
-                        "final_tax": final_tax, "tax_payable": final_tax/1.04, "cess": final_tax - (final_tax/1.04), "audit_score": 0
-                    }
+                    # Same pipeline as the batch CLI, run in-process or by the HTTP API (see api_client.py)
+                    # Stage timings (calculate, audit, save, ITR JSON...) are collected by metrics.py
+                    file_return, optimize_deductions = load_filing()
+                    result = file_return(user)
+                    best_regime, audit_report = result["best_regime"], result["audit"]
                     
                     # 2. Show Results
                     st.success("✅ Calculation Complete!")
                     r1, r2, r3 = st.columns(3)
-                    r1.metric("Tax (New)", f"₹ {tax_new:,.0f}")
-                    r2.metric("Tax (Old)", f"₹ {tax_old:,.0f}")
+                    r1.metric("Tax (New)", f"₹ {result['tax_new']:,.0f}")
+                    r2.metric("Tax (Old)", f"₹ {result['tax_old']:,.0f}")
                     r3.info(f"💡 Recommendation: **{best_regime} Regime**")
 
+                    # Tax-saving plan: extra 80C / 80D investment within the limits (see optimizer.py)
+                    with span("app.optimize"):
+                        plan = optimize_deductions(user)
+                    if plan["savings"] > 0:
+                        st.info(f"💰 Invest ₹ {plan['invest_80c']:,.0f} more under 80C and ₹ {plan['invest_80d']:,.0f} "
+                                f"under 80D and file in the Old Regime to save ₹ {plan['savings']:,.0f}.")
+                    elif best_regime == "New" and plan["breakeven_within_caps"]:
+                        st.caption(f"Old Regime breaks even with ₹ {plan['breakeven_deduction']:,.0f} more in deductions.")
+
                     # 3. Audit
                     st.divider()
                     st.markdown("#### 📋 Compliance Audit")
-                    audit_report = audit_tax_return(user, summary)
                     
                     if audit_report["risk_score"] == 0:
                         st.success(f"✅ {audit_report['message']}")
@@ -178,19 +267,14 @@ else:
                         st.error(f"🛑 {audit_report['message']}")
 
                     # 4. Save to DB (Safe Mode)
-                    # We wrap this in try/except so if DB fails, the App DOES NOT crash
-                    try:
-                        if audit_report["risk_score"] < 100:
-                            save_tax_record({"name": name_in, "pan": pan_in, "status": "Generated", "income": income_in, "tax": final_tax})
-                            st.toast("💾 Record Saved to Database")
-                    except Exception as db_err:
-                        # Just log it, don't stop the user
-                        print(f"Database Warning: {db_err}")
+                    # Saved by file_return: in-process via the write-behind queue (a slow DB never blocks the user),
+                    # or by the API straight to MongoDB when SAHAJ_API_URL is set.
+                    if result["saved"]:
+                        st.toast("💾 Record Saved to Database")
 
                     # 5. Download
-                    if audit_report["risk_score"] < 100:
-                        json_packet = generate_govt_json(user, summary)
-                        st.download_button("📥 Download ITR JSON", json_packet, f"ITR_{pan_in}.json")
+                    if result["can_file"]:
+                        st.download_button("📥 Download ITR JSON", result["itr_json"], f"ITR_{pan_in}.json")
 
                 except Exception as e:
                     # IF IT CRASHES, SHOW THE REASON
@@ -204,15 +288,77 @@ else:
         with tab2:
             st.markdown('<div class="service-card">', unsafe_allow_html=True)
             st.markdown("#### 🗄️ Tax Records")
-            if st.button("🔄 Sync Records"): st.rerun()
-            
-            try:
-                records = get_all_records()
-                if records: st.dataframe(pd.DataFrame(records), use_container_width=True)
-                else: st.info("No records found.")
-            except Exception as e:
-                st.warning("Could not connect to Database. Is MongoDB running?")
-            
+
+            # Loaded on demand like the What-if Explorer: pandas, pymongo and the MongoDB queries
+            # only run while this is on, not on every rerun of the filing tab
+            if st.toggle("📂 Load records", key="records_on"):
+                import pandas as pd
+                database = load_records()
+
+                # Filters (applied by MongoDB, not pandas)
+                f1, f2, f3 = st.columns(3)
+                pan_filter = f1.text_input("Filter by PAN", key="rec_pan").strip().upper()
+                status_filter = f2.selectbox("Status", ["All", "Generated"], key="rec_status")
+                date_filter = f3.date_input("Created between", value=(), key="rec_dates")
+                filters = {"pan": pan_filter or None, "status": None if status_filter == "All" else status_filter,
+                           "date_from": None, "date_to": None}
+                if len(date_filter) == 2:
+                    filters["date_from"] = datetime.combine(date_filter[0], datetime.min.time())
+                    filters["date_to"] = datetime.combine(date_filter[1] + timedelta(days=1), datetime.min.time())
+
+                # Page cursors: one entry per page visited, so "Previous" can go back
+                if st.session_state.get("records_filters") != filters:
+                    st.session_state["records_filters"] = filters
+                    st.session_state["records_pages"] = [None]
+                if st.button("🔄 Sync Records"):
+                    st.session_state["records_pages"] = [None]
+                    load_dashboard_stats.clear()
+                    st.rerun()
+
+                try:
+                    # KPIs come from one MongoDB aggregation over the filtered records (cached, see DASHBOARD_STATS_TTL)
+                    stats = load_dashboard_stats(**filters)
+                    k1, k2, k3 = st.columns(3)
+                    k1.metric("Filings", f"{stats['totals']['filings']:,}")
+                    k2.metric("Total Tax", f"₹ {stats['totals']['total_tax'] or 0:,.0f}")
+                    k3.metric("Average Tax", f"₹ {stats['totals']['avg_tax'] or 0:,.0f}")
+                    with st.expander("📊 Statistics"):
+                        s1, s2 = st.columns(2)
+                        if stats["by_regime"]:
+                            s1.markdown("**Tax by Regime**")
+                            s1.bar_chart(pd.DataFrame(stats["by_regime"]).set_index("regime")["total_tax"])
+                        if stats["filings_per_day"]:
+                            s2.markdown("**Filings per Day**")
+                            s2.line_chart(pd.DataFrame(stats["filings_per_day"]).set_index("day")["filings"])
+                        if stats["income_distribution"]:
+                            st.markdown("**Income Distribution**")
+                            st.dataframe(pd.DataFrame(stats["income_distribution"]), use_container_width=True)
+
+                    pages = st.session_state["records_pages"]
+                    records, next_cursor = database.get_records_page(pages[-1], fields=RECORD_FIELDS, **filters)
+                    if records: st.dataframe(pd.DataFrame(records), use_container_width=True)
+                    else: st.info("No records found.")
+
+                    p1, p2, p3 = st.columns([1, 2, 1])
+                    if len(pages) > 1 and p1.button("⬅️ Previous"):
+                        pages.pop()
+                        st.rerun()
+                    p2.caption(f"Page {len(pages)}")
+                    if next_cursor is not None and p3.button("Next ➡️"):
+                        pages.append(next_cursor)
+                        st.rerun()
+                except Exception as e:
+                    st.warning("Could not connect to Database. Is MongoDB running?")
+
+                # Where the time goes in this app process (see metrics.py; Prometheus text at /metrics in api.py)
+                with st.expander("⏱️ Performance"):
+                    perf = metrics_snapshot()
+                    if perf["stages"]: st.dataframe(pd.DataFrame(perf["stages"]).T, use_container_width=True)
+                    else: st.info("No timings recorded yet.")
+                    if perf["counters"]: st.json(perf["counters"])
+            else:
+                st.caption("Switch on to browse the saved returns and the dashboard.")
+
             st.markdown('</div>', unsafe_allow_html=True)
 
     # --- TAB 3: CHAT ---
@@ -229,7 +375,7 @@ else:
                 
                 # Safe Chat Call
                 try:
-                    reply = get_custom_response(prompt)
+                    reply = load_sahayak()(prompt)
                     st.chat_message("assistant").markdown(reply)
                     st.session_state.messages.append({"role": "assistant", "content": reply})
                 except Exception as e:
@@ -1,10 +1,121 @@
 # auditor.py
 # This AI acts as a "Compliance Officer" to verify data before filing.
+# Rules are declarative (see RULES) and run either on one return or, vectorized,
+# on a whole DataFrame of returns (e.g. the nightly audit of the records collection).
+# Audits are pure: the peer statistics are passed in by the caller (see peer_stats.py),
+# so the same return with the same snapshot always gets the same report.
+import os
+from dataclasses import dataclass
+from typing import Callable, Optional
+import numpy as np
 
-def audit_tax_return(user_data, tax_details):
+# --- LIMITS ---
+PAN_LENGTH = 10
+SECTION_80C_LIMIT = 150000
+HIGH_DEDUCTION_RATIO = 0.5   # Deductions above this share of salary trigger scrutiny
+WARNING_SCORE = 50           # risk_score from here on is "HIGH RISK"
+ANOMALY_Z = 3.0              # Standard deviations above the peer group (see peer_stats.py)
+
+# Rule ids switched off without a code change, e.g. SAHAJ_AUDIT_DISABLED_RULES="deduction_ratio,80c_limit"
+DISABLED_RULES = {r.strip() for r in os.environ.get("SAHAJ_AUDIT_DISABLED_RULES", "").split(",") if r.strip()}
+
+MESSAGES = {
+    "clean": "✅ Perfect! Your return is clean and ready for filing.",
+    "warning": "⚠️ Good, but check the warnings above.",
+    "risk": "🛑 HIGH RISK: Do not file until errors are fixed.",
+}
+
+# Columns the rules read (TaxPayer fields + the calculator's recommendation) and their defaults
+AUDIT_COLUMNS = {"pan_number": "", "age": 0, "salary_income": 0.0, "section_80c_deductions": 0.0,
+                 "section_80d_deductions": 0.0, "better_regime": "New"}
+# Stored tax record field -> audit column (see pipeline.build_record)
+RECORD_COLUMNS = {"pan": "pan_number", "income": "salary_income", "regime": "better_regime",
+                  "section_80c": "section_80c_deductions", "section_80d": "section_80d_deductions"}
+
+@dataclass(frozen=True)
+class Rule:
     """
-    Analyzes the tax return for risks, errors, and optimization opportunities.
-    Returns a Compliance Report.
+    One compliance check.
+    check(row) tests a single return (a dict of AUDIT_COLUMNS); vector(df) is the
+    same test over a DataFrame and returns a boolean Series.
+    severity "error" fails the return, "warning" flags it, "info" only adds advice.
+    uses_peers: check / vector also get the PeerStats snapshot, and the rule is
+    skipped when the audit is run without one.
+    """
+    id: str
+    severity: str
+    weight: int
+    check: Callable
+    vector: Callable
+    flag: Optional[str] = None
+    recommendation: Optional[str] = None
+    uses_peers: bool = False
+
+def _total_deductions(r):
+    return r["section_80c_deductions"] + r["section_80d_deductions"]
+
+def _peer_z(r, peer_stats):
+    """Largest z-score of the return's deduction ratios within its income / age peer group"""
+    z = peer_stats.z_scores(r["salary_income"], r["age"], r["section_80c_deductions"], r["section_80d_deductions"])
+    return max(z.values(), default=0.0)
+
+# --- RULES (evaluated in this order; flags and advice are reported in this order) ---
+RULES = [
+    Rule("pan_format", "error", 100,
+         check=lambda r: len(r["pan_number"]) != PAN_LENGTH,
+         vector=lambda df: df["pan_number"].str.len() != PAN_LENGTH,
+         flag="❌ Invalid PAN format (Must be 10 chars)."),
+    Rule("80c_limit", "warning", 0,
+         check=lambda r: r["section_80c_deductions"] > SECTION_80C_LIMIT,
+         vector=lambda df: df["section_80c_deductions"] > SECTION_80C_LIMIT,
+         flag="⚠️ 80C Claim exceeds ₹1.5 Lakh limit. Excess will be ignored.",
+         recommendation="Restrict 80C claim to ₹1,50,000 to avoid query."),
+    Rule("deduction_ratio", "warning", 30,
+         check=lambda r: r["salary_income"] > 0 and _total_deductions(r) > r["salary_income"] * HIGH_DEDUCTION_RATIO,
+         vector=lambda df: (df["salary_income"] > 0) & (_total_deductions(df) > df["salary_income"] * HIGH_DEDUCTION_RATIO),
+         flag="⚠️ High Deductions detected (>50% of income). This triggers audit scrutiny."),
+    Rule("peer_anomaly", "warning", 25,
+         check=lambda r, peers: _peer_z(r, peers) >= ANOMALY_Z,
+         vector=lambda df, peers: peers.z_scores_frame(df) >= ANOMALY_Z,
+         flag="⚠️ Deductions are far above other taxpayers of your income and age. This may trigger scrutiny.",
+         recommendation="Keep receipts for every 80C / 80D claim ready.",
+         uses_peers=True),
+    Rule("old_regime_proofs", "info", 0,
+         check=lambda r: r["better_regime"] == "Old",
+         vector=lambda df: df["better_regime"] == "Old",
+         recommendation="✅ Old Regime selected. Ensure you have proofs for HRA and 80C."),
+    Rule("new_regime_proofs", "info", 0,
+         check=lambda r: r["better_regime"] != "Old",
+         vector=lambda df: df["better_regime"] != "Old",
+         recommendation="✅ New Regime selected. No investment proofs needed."),
+]
+RULES_BY_ID = {rule.id: rule for rule in RULES}
+
+def active_rules(disabled=None):
+    """The registered rules minus the disabled ones (DISABLED_RULES by default)"""
+    disabled = DISABLED_RULES if disabled is None else set(disabled)
+    unknown = disabled - set(RULES_BY_ID)
+    if unknown:
+        raise ValueError(f"Unknown audit rule(s): {', '.join(sorted(unknown))}")
+    return [rule for rule in RULES if rule.id not in disabled]
+
+def _runnable(rules, peer_stats):
+    """The rules that can run: peer rules need a snapshot"""
+    rules = active_rules() if rules is None else rules
+    return [rule for rule in rules if peer_stats is not None or not rule.uses_peers]
+
+def _verdict(risk_score, failed):
+    """(status, message) for a final score"""
+    if risk_score == 0:
+        return ("FAIL" if failed else "PASS"), MESSAGES["clean"]
+    if risk_score < WARNING_SCORE:
+        return ("FAIL" if failed else "PASS"), MESSAGES["warning"]
+    return "RISK", MESSAGES["risk"]
+
+def audit_record(row, rules=None, peer_stats=None):
+    """
+    Runs the rules on one return given as a dict of AUDIT_COLUMNS. Returns a Compliance Report.
+    peer_stats: a PeerStats snapshot for the peer_anomaly rule (None = rule not run).
     """
     report = {
         "status": "PASS",
@@ -12,38 +123,63 @@ def audit_tax_return(user_data, tax_details):
         "flags": [],
         "recommendations": []
     }
-
-    # --- RULE 1: PAN Card Validation ---
-    pan = user_data.pan_number
-    if len(pan) != 10:
-        report["flags"].append("❌ Invalid PAN format (Must be 10 chars).")
-        report["status"] = "FAIL"
-        report["risk_score"] += 100
-
-    # --- RULE 2: Investment Limit Checks ---
-    if user_data.section_80c_deductions > 150000:
-        report["flags"].append("⚠️ 80C Claim exceeds ₹1.5 Lakh limit. Excess will be ignored.")
-        report["recommendations"].append("Restrict 80C claim to ₹1,50,000 to avoid query.")
-    
-    # --- RULE 3: Suspiciously Low Income vs Deductions ---
-    total_deductions = user_data.section_80c_deductions + user_data.section_80d_deductions
-    if user_data.salary_income > 0 and (total_deductions > user_data.salary_income * 0.5):
-        report["flags"].append("⚠️ High Deductions detected (>50% of income). This triggers audit scrutiny.")
-        report["risk_score"] += 30
-
-    # --- RULE 4: Regime Analysis ---
-    if tax_details["better_regime"] == "Old":
-        report["recommendations"].append("✅ Old Regime selected. Ensure you have proofs for HRA and 80C.")
-    else:
-        report["recommendations"].append("✅ New Regime selected. No investment proofs needed.")
+    failed = False
+    for rule in _runnable(rules, peer_stats):
+        if not (rule.check(row, peer_stats) if rule.uses_peers else rule.check(row)):
+            continue
+        report["risk_score"] += rule.weight
+        failed = failed or rule.severity == "error"
+        if rule.flag:
+            report["flags"].append(rule.flag)
+        if rule.recommendation:
+            report["recommendations"].append(rule.recommendation)
 
     # --- FINAL VERDICT ---
-    if report["risk_score"] == 0:
-        report["message"] = "✅ Perfect! Your return is clean and ready for filing."
-    elif report["risk_score"] < 50:
-        report["message"] = "⚠️ Good, but check the warnings above."
-    else:
-        report["status"] = "RISK"
-        report["message"] = "🛑 HIGH RISK: Do not file until errors are fixed."
-
-    return report
\ No newline at end of file
+    report["status"], report["message"] = _verdict(report["risk_score"], failed)
+    return report
+
+def audit_tax_return(user_data, tax_details, peer_stats=None):
+    """
+    Analyzes the tax return for risks, errors, and optimization opportunities.
+    Returns a Compliance Report. peer_stats: see audit_record.
+    """
+    row = {field: getattr(user_data, field) for field in AUDIT_COLUMNS if field != "better_regime"}
+    row["better_regime"] = tax_details["better_regime"]
+    return audit_record(row, peer_stats=peer_stats)
+
+def audit_dataframe(df, rules=None, details=True, peer_stats=None):
+    """
+    Vectorized audit of many returns. df needs the AUDIT_COLUMNS (missing ones get their defaults).
+    Returns a DataFrame on the same index with one boolean column per rule id plus
+    risk_score, status, message and, if details=True, the flags / recommendations lists.
+    """
+    import pandas as pd  # Only the batch paths need pandas; single returns stay import-light
+    rules = _runnable(rules, peer_stats)
+    df = df.assign(**{col: default for col, default in AUDIT_COLUMNS.items() if col not in df.columns})
+    df = df.fillna(AUDIT_COLUMNS)
+
+    hits = pd.DataFrame({rule.id: np.asarray(rule.vector(df, peer_stats) if rule.uses_peers else rule.vector(df), dtype=bool)
+                         for rule in rules}, index=df.index)
+    weights = np.array([rule.weight for rule in rules])
+    is_error = np.array([rule.severity == "error" for rule in rules], dtype=bool)
+    hit_matrix = hits.to_numpy()
+
+    risk_score = hit_matrix @ weights if rules else np.zeros(len(df), dtype=int)
+    failed = hit_matrix[:, is_error].any(axis=1)
+    result = hits.assign(
+        risk_score=risk_score,
+        status=np.select([risk_score >= WARNING_SCORE, failed], ["RISK", "FAIL"], "PASS"),
+        message=np.select([risk_score == 0, risk_score < WARNING_SCORE], [MESSAGES["clean"], MESSAGES["warning"]], MESSAGES["risk"]),
+    )
+    if details:
+        flags = [rule.flag for rule in rules]
+        advice = [rule.recommendation for rule in rules]
+        result["flags"] = [[f for f, hit in zip(flags, row) if hit and f] for row in hit_matrix]
+        result["recommendations"] = [[a for a, hit in zip(advice, row) if hit and a] for row in hit_matrix]
+    return result
+
+def audit_records(records, rules=None, details=False, peer_stats=None):
+    """Audits stored tax records (see database.get_all_records), e.g. as a nightly job"""
+    import pandas as pd
+    df = pd.DataFrame(list(records)).rename(columns=RECORD_COLUMNS)
+    return audit_dataframe(df, rules, details, peer_stats)
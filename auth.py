@@ -2,37 +2,111 @@
 import streamlit as st
 import json
 import os
+import hashlib
+import hmac
+import secrets
+import sqlite3
+import threading
+from functools import lru_cache
 
-DB_FILE = "users_db.json"
+USER_DB = os.environ.get("SAHAJ_USER_DB", "users.db")
+DB_FILE = "users_db.json"  # Old plain-text store, imported into USER_DB on first use
+DEFAULT_USERS = {"admin": "admin123", "user": "user123"}
 
-def load_users():
-    """Loads users from a local JSON file (Persistent Storage)"""
-    if not os.path.exists(DB_FILE):
-        # Default fallback if file doesn't exist
-        return {"admin": "admin123", "user": "user123"}
+# --- PASSWORD HASHING ---
+# PBKDF2-HMAC-SHA256 with a random salt per user. Raise HASH_ITERATIONS to make
+# hashes slower to crack; existing users are re-hashed on their next login.
+HASH_ITERATIONS = int(os.environ.get("SAHAJ_HASH_ITERATIONS", "310000"))
+# Users imported from users_db.json get a single salted round (so a big import is instant)
+# and are upgraded to HASH_ITERATIONS by the re-hash on their first login
+LEGACY_ITERATIONS = 1
+SALT_BYTES = 16
+
+def hash_password(password, iterations=None):
+    """Returns 'pbkdf2_sha256$iterations$salt$hash' (hex encoded)"""
+    iterations = iterations or HASH_ITERATIONS
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+def verify_password(password, stored):
+    """Checks a password against a hash_password() string (constant-time compare)"""
     try:
-        with open(DB_FILE, "r") as f:
-            return json.load(f)
-    except:
-        return {"admin": "admin123", "user": "user123"}
+        algorithm, iterations, salt, expected = stored.split("$")
+    except ValueError:
+        return False
+    if algorithm != "pbkdf2_sha256":
+        return False
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(digest.hex(), expected)
+
+def _needs_rehash(stored):
+    return stored.split("$")[1] != str(HASH_ITERATIONS)
+
+@lru_cache(maxsize=1)
+def _dummy_hash():
+    """Checked for unknown usernames so a failed login costs the same either way"""
+    return hash_password("not-a-real-password")
+
+# --- USER STORE (SQLite, username is the primary key) ---
+_db = None
+_db_lock = threading.Lock()
+
+def _get_db():
+    """Opens the user database once per process, creating and seeding it if needed"""
+    global _db
+    with _db_lock:
+        if _db is None:
+            db = sqlite3.connect(USER_DB, check_same_thread=False, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                db.execute("CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password_hash TEXT NOT NULL)")
+                if db.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+                    _seed_users(db)
+            _db = db
+        return _db
+
+def _seed_users(db):
+    """Imports the old users_db.json, or the default accounts (cheap hashes, upgraded at first login)"""
+    users = DEFAULT_USERS
+    if os.path.exists(DB_FILE):
+        try:
+            with open(DB_FILE, "r") as f:
+                users = json.load(f)
+        except (OSError, ValueError):
+            pass
+    # OR IGNORE: another process may be seeding at the same time
+    db.executemany("INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+                   [(username, hash_password(password, LEGACY_ITERATIONS)) for username, password in users.items()])
 
 def save_new_user(username, password):
     """Registers a new user"""
-    users = load_users()
-    if username in users:
+    db = _get_db()
+    password_hash = hash_password(password)
+    try:
+        # One atomic INSERT; the primary key rejects duplicates even under concurrent sign-ups
+        with _db_lock, db:
+            db.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", (username, password_hash))
+    except sqlite3.IntegrityError:
         return False # User already exists
-    
-    users[username] = password
-    with open(DB_FILE, "w") as f:
-        json.dump(users, f)
     return True
 
 def check_login(username, password):
     """Verifies credentials"""
-    users = load_users()
-    if username in users and users[username] == password:
-        return "admin" if username == "admin" else "user"
-    return None
+    db = _get_db()
+    with _db_lock:
+        row = db.execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
+    if row is None:
+        verify_password(password, _dummy_hash())
+        return None
+    if not verify_password(password, row[0]):
+        return None
+
+    if _needs_rehash(row[0]):
+        password_hash = hash_password(password)
+        with _db_lock, db:
+            db.execute("UPDATE users SET password_hash = ? WHERE username = ?", (password_hash, username))
+    return "admin" if username == "admin" else "user"
 
 def login_screen():
     """New Tabbed Interface for Login / Sign Up"""
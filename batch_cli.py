@@ -0,0 +1,197 @@
+# batch_cli.py
+# Headless batch processing: streams a CSV / JSONL file of taxpayers through the
+# same pipeline as the "Process Application" button (validation, both regimes,
+# audit, save, ITR JSON) using a pool of worker processes.
+#
+# Usage: python batch_cli.py taxpayers.csv --out itr_output --workers 8 [--export zip]
+# Input columns / keys are the TaxPayer fields (name, pan_number, age, salary_income, ...).
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pydantic import ValidationError
+from models import TaxPayer
+from pipeline import process_return, build_record
+from filing import ITRExporter, fixed_clock, random_submission_id, stable_submission_id
+from peer_stats import PeerStats, load_peer_stats
+
+CHUNK_SIZE = 256        # Returns sent to a worker at a time
+MAX_IN_FLIGHT = 2       # Chunks queued per worker (keeps memory flat on huge files)
+# The batch's own write-behind spill file, inside --out (never the app's pending_records.jsonl).
+# Records still pending after a MongoDB outage are retried by the next run with the same --out.
+SPILL_FILE = "pending_records.jsonl"
+
+# Row key for a line that could not be parsed (reported as a failed row, like invalid taxpayers)
+PARSE_ERROR = "_parse_error"
+
+def read_taxpayers(path, input_format=None):
+    """Yields (line_number, row dict) from a CSV or JSONL file, one row at a time"""
+    input_format = input_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if input_format == "csv":
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                # Empty CSV cells mean "use the TaxPayer default"
+                yield line_number, {k: v for k, v in row.items() if v not in ("", None)}
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    row = {PARSE_ERROR: f"Invalid JSON: {e.msg} (column {e.colno})"}
+                if not isinstance(row, dict):
+                    row = {PARSE_ERROR: "Invalid JSON: expected an object"}
+                yield line_number, row
+
+def _process_chunk(rows, peer_stats, assessment_year, compact=False, stable_ids=False, timestamp=None):
+    """Runs in a worker process. One bad row never fails the rest of the chunk."""
+    id_provider = stable_submission_id if stable_ids else random_submission_id
+    clock = fixed_clock(timestamp) if timestamp else datetime.now  # The ISO string is sent, a lambda can't be pickled
+    results = []
+    for line_number, row in rows:
+        if PARSE_ERROR in row:
+            results.append({"line": line_number, "pan": "", "error": row[PARSE_ERROR]})
+            continue
+        try:
+            user = TaxPayer(**row)
+            outcome = process_return(user, assessment_year, compact=compact, id_provider=id_provider, clock=clock,
+                                     peer_stats=peer_stats)
+            outcome["line"] = line_number
+            outcome["record"] = build_record(user, outcome["best_regime"], outcome["final_tax"]) if outcome["can_file"] else None
+        except ValidationError as e:
+            outcome = {"line": line_number, "error": f"Invalid taxpayer: {e.errors()[0]['loc']} {e.errors()[0]['msg']}"}
+        except Exception as e:
+            outcome = {"line": line_number, "error": str(e)}
+        outcome.setdefault("pan", row.get("pan_number", ""))
+        results.append(outcome)
+    return results
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _run_chunks(chunks, workers, *options):
+    """Yields result lists as chunks finish (in-process when workers == 0)"""
+    if workers == 0:
+        for chunk in chunks:
+            yield _process_chunk(chunk, *options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for chunk in chunks:
+            in_flight.add(executor.submit(_process_chunk, chunk, *options))
+            if len(in_flight) >= workers * MAX_IN_FLIGHT:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in in_flight:
+            yield future.result()
+
+def run_batch(input_path, out_dir, workers=None, input_format=None, assessment_year=None, save_to_db=True,
+              export="files", stable_ids=False, timestamp=None):
+    """
+    Processes a whole file. Returns the throughput stats.
+    export: "files" = one indented ITR_<line>_<PAN>.json per return, "ndjson" / "zip" =
+    compact ITR JSON streamed into a single itr_returns.ndjson / itr_returns.zip.
+    stable_ids + timestamp (ISO string used as every filing's timestamp) = identical output on every run.
+    """
+    if timestamp:
+        datetime.fromisoformat(timestamp)  # Raises here, not once per row in the workers
+    workers = os.cpu_count() if workers is None else workers
+    os.makedirs(out_dir, exist_ok=True)
+    stats = {"processed": 0, "filed": 0, "blocked": 0, "failed": 0}
+
+    # Peer statistics for the anomaly rule: read once here and sent with every chunk (a few dozen groups),
+    # so every audit scores against the same snapshot and workers never connect to MongoDB for it (none with --no-db)
+    peer_stats = (load_peer_stats() if save_to_db else None) or PeerStats()
+
+    queue = None
+    if save_to_db:
+        # Records are written in batches by a write-behind queue of our own (spilled to disk if MongoDB is down)
+        from write_behind import WriteBehindQueue
+        queue = WriteBehindQueue(spill_file=os.path.join(out_dir, SPILL_FILE))
+
+    start = time.perf_counter()
+    chunks = _chunks(read_taxpayers(input_path, input_format), CHUNK_SIZE)
+    # A failed run removes the exporter's temporary file (see ITRExporter.__exit__)
+    with (ITRExporter(os.path.join(out_dir, f"itr_returns.{export}"), export) if export != "files" else nullcontext()) as exporter, \
+         open(os.path.join(out_dir, "audit_reports.jsonl"), "w", encoding="utf-8") as audit_out, \
+         open(os.path.join(out_dir, "errors.jsonl"), "w", encoding="utf-8") as error_out:
+        for results in _run_chunks(chunks, workers, peer_stats, assessment_year, exporter is not None, stable_ids,
+                                   timestamp):
+            for outcome in results:
+                stats["processed"] += 1
+                if "error" in outcome:
+                    stats["failed"] += 1
+                    error_out.write(json.dumps({"line": outcome["line"], "pan": outcome["pan"], "error": outcome["error"]}) + "\n")
+                    continue
+
+                audit_out.write(json.dumps({
+                    "line": outcome["line"], "pan": outcome["pan"], "regime": outcome["best_regime"],
+                    "tax_new": outcome["tax_new"], "tax_old": outcome["tax_old"], "final_tax": outcome["final_tax"],
+                    "audit": outcome["audit"],
+                }, ensure_ascii=False) + "\n")
+                if not outcome["can_file"]:
+                    stats["blocked"] += 1
+                    continue
+
+                stats["filed"] += 1
+                itr_name = f"ITR_{outcome['line']:07d}_{outcome['pan']}.json"
+                if exporter is not None:
+                    exporter.add(outcome["itr_json"], name=itr_name)
+                else:
+                    with open(os.path.join(out_dir, itr_name), "w", encoding="utf-8") as f:
+                        f.write(outcome["itr_json"])
+                if queue is not None:
+                    queue.put(outcome["record"])
+
+    if queue is not None:
+        queue.close()  # Final flush before we report (only this batch's queue; the app's shared one stays open)
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    stats["returns_per_second"] = round(stats["processed"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    if queue is not None:
+        stats["db_written"] = queue.stats["written"]
+        stats["db_pending"] = queue.pending()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch ITR processing without the UI")
+    parser.add_argument("input", help="CSV or JSONL file of taxpayers")
+    parser.add_argument("--out", default="itr_output", help="Folder for ITR JSON files and audit reports")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = in-process)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Input format (default: from extension)")
+    parser.add_argument("--assessment-year", default=None, help="e.g. 2025-26 (default: current year)")
+    parser.add_argument("--no-db", action="store_true", help="Do not save records to MongoDB")
+    parser.add_argument("--export", choices=["files", "ndjson", "zip"], default="files",
+                        help="ITR JSON output: one file per return, or one NDJSON / zip file")
+    parser.add_argument("--stable-ids", action="store_true", help="Derive submission IDs from the return")
+    parser.add_argument("--timestamp", default=None,
+                        help="ISO timestamp for every filing, e.g. 2025-07-31T00:00:00 (with --stable-ids: reproducible output)")
+    args = parser.parse_args()
+    if args.timestamp:
+        try:
+            datetime.fromisoformat(args.timestamp)
+        except ValueError:
+            parser.error(f"--timestamp must be an ISO date / datetime, got {args.timestamp!r}")
+
+    stats = run_batch(args.input, args.out, args.workers, args.format, args.assessment_year, save_to_db=not args.no_db,
+                      export=args.export, stable_ids=args.stable_ids, timestamp=args.timestamp)
+    print(f"Processed {stats['processed']} returns in {stats['seconds']}s ({stats['returns_per_second']} returns/s)")
+    print(f"  ✅ Filed: {stats['filed']}   🛑 Blocked by audit: {stats['blocked']}   ❌ Failed: {stats['failed']}")
+    if "db_written" in stats:
+        print(f"  💾 Saved to DB: {stats['db_written']}   Pending (spilled): {stats['db_pending']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/bench_ocr.py
+# Time per page and extraction accuracy of the OCR modes in local_ai:
+# full page vs. preprocessed full page vs. preprocessed region-of-interest.
+# Needs a working Tesseract install (see local_ai.py).
+# Usage: python benchmarks/bench_ocr.py --pages 10 --dpi 300
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import local_ai
+from generators import make_form16_page
+
+MODES = {
+    "full": {"preprocess": False, "mode": "full"},
+    "full+prep": {"preprocess": True, "mode": "full"},
+    "roi+prep": {"preprocess": True, "mode": "roi"},
+}
+
+def run(pages, dpi):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as folder:
+        truth = []
+        for i in range(pages):
+            pan = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(5)) + f"{rng.randint(0, 9999):04d}" + rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+            salary = rng.randint(3, 40) * 100000 + rng.randint(0, 99999)
+            path = os.path.join(folder, f"form16_{i}.png")
+            make_form16_page(pan, salary, dpi, skew=rng.uniform(-2, 2), seed=i).save(path, dpi=(dpi, dpi))
+            truth.append((path, pan, float(salary)))
+
+        print(f"{pages} synthetic pages at {dpi} dpi")
+        print(f"{'mode':<12}{'s/page':>10}{'PAN acc':>10}{'salary acc':>12}{'errors':>8}")
+        for name, options in MODES.items():
+            start = time.perf_counter()
+            results = [local_ai.ai_extract_data(path, use_cache=False, **options) for path, _, _ in truth]
+            per_page = (time.perf_counter() - start) / pages
+            errors = sum(1 for r in results if r.get("error"))
+            pan_ok = sum(1 for r, (_, pan, _) in zip(results, truth) if r.get("pan") == pan)
+            salary_ok = sum(1 for r, (_, _, salary) in zip(results, truth) if r.get("salary") == salary)
+            print(f"{name:<12}{per_page:>10.3f}{pan_ok / pages:>10.0%}{salary_ok / pages:>12.0%}{errors:>8}")
+            if errors:
+                print(f"  first error: {next(r['error'] for r in results if r.get('error'))}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the OCR modes of local_ai")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--dpi", type=int, default=300)
+    args = parser.parse_args()
+    run(args.pages, args.dpi)
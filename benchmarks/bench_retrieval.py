@@ -0,0 +1,47 @@
+# benchmarks/bench_retrieval.py
+# Compares the AI Sahayak retrieval backends against the brute-force scan.
+# Usage: python benchmarks/bench_retrieval.py --size 20000 --queries 500
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from retrieval import RETRIEVERS, make_retriever
+from generators import make_knowledge_base, make_queries
+
+def run(size, n_queries, k):
+    questions = make_knowledge_base(size)
+    queries = make_queries(questions, n_queries)
+    vectorizer = TfidfVectorizer()
+    matrix = vectorizer.fit_transform(questions)
+    query_vectors = [vectorizer.transform([q]) for q in queries]
+
+    baseline = None
+    print(f"knowledge base: {size} questions, {n_queries} queries, top-{k}")
+    print(f"{'backend':<10}{'build (s)':>12}{'ms/query':>12}{'recall@k':>12}")
+    for name in RETRIEVERS:
+        start = time.perf_counter()
+        retriever = make_retriever(name).fit(matrix)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [retriever.search(v, k) for v in query_vectors]
+        per_query = (time.perf_counter() - start) * 1000 / n_queries
+
+        found = [{i for i, _ in r} for r in results]
+        if baseline is None:
+            baseline = found
+        hits = sum(len(f & b) for f, b in zip(found, baseline))
+        recall = hits / max(1, sum(len(b) for b in baseline))
+        print(f"{name:<10}{build:>12.3f}{per_query:>12.3f}{recall:>12.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+    run(args.size, args.queries, args.k)
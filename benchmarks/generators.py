@@ -0,0 +1,119 @@
+# benchmarks/generators.py
+# Reproducible synthetic inputs for the benchmarks: taxpayers, knowledge
+# bases and Form 16 scans. Same seed -> same data, so runs are comparable.
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from models import TaxPayer
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Kavya", "Rohan", "Sneha", "Vikram", "Ananya", "Arjun", "Meera"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Reddy", "Das", "Khadiratna", "Singh", "Nair", "Gupta", "Mehta"]
+
+# --- TAXPAYERS ---
+def make_pan(rng):
+    return "".join(rng.choice(LETTERS) for _ in range(5)) + f"{rng.randint(0, 9999):04d}" + rng.choice(LETTERS)
+
+def make_taxpayers(count, seed=1):
+    """TaxPayer objects with a realistic spread of incomes and deductions"""
+    rng = random.Random(seed)
+    taxpayers = []
+    for _ in range(count):
+        salary = round(rng.lognormvariate(13.7, 0.7), -3)  # Median ~9L
+        taxpayers.append(TaxPayer(
+            name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            pan_number=make_pan(rng),
+            age=rng.randint(21, 85),
+            salary_income=salary,
+            interest_income=rng.choice([0.0, 0.0, round(rng.uniform(0, 80000), -2)]),
+            section_80c_deductions=rng.choice([0.0, 50000.0, 100000.0, 150000.0, round(rng.uniform(0, 200000), -3)]),
+            section_80d_deductions=rng.choice([0.0, 0.0, 25000.0, round(rng.uniform(0, 50000), -3)]),
+        ))
+    return taxpayers
+
+def make_taxpayer_columns(count, seed=1):
+    """The same kind of data as NumPy columns (for the vectorized engines)"""
+    rng = np.random.default_rng(seed)
+    return {
+        "salary_income": np.round(rng.lognormal(13.7, 0.7, count), -3),
+        "interest_income": np.where(rng.random(count) < 0.6, 0.0, np.round(rng.uniform(0, 80000, count), -2)),
+        "section_80c_deductions": rng.choice([0.0, 50000.0, 100000.0, 150000.0, 200000.0], count),
+        "section_80d_deductions": rng.choice([0.0, 0.0, 25000.0, 50000.0], count),
+        "age": rng.integers(21, 86, count),
+    }
+
+# --- KNOWLEDGE BASE ---
+TOPICS = ["salary", "80C", "80D", "HRA", "LTA", "PPF", "ELSS", "NPS", "TDS", "Form 16", "ITR-1", "ITR-2",
+          "capital gains", "home loan", "rent", "pension", "gratuity", "bonus", "interest", "dividend",
+          "advance tax", "refund", "regime", "rebate 87A", "standard deduction", "surcharge", "cess", "PAN",
+          "Aadhaar", "e-verify", "senior citizen", "NRI", "freelancer", "crypto", "gift", "agriculture"]
+TEMPLATES = ["How is {a} taxed when I also have {b}?", "Can I claim {a} and {b} together?",
+             "What is the limit for {a} under {b}?", "Is {a} exempt if I file {b}?",
+             "Where do I show {a} in {b}?", "Does {a} change my {b}?"]
+
+def make_knowledge_base(size, seed=7):
+    """Synthetic tax FAQ questions (unique, reproducible)"""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(size):
+        a, b = rng.sample(TOPICS, 2)
+        questions.append(rng.choice(TEMPLATES).format(a=a, b=b) + f" case {i}")
+    return questions
+
+def make_knowledge_entries(size, seed=7):
+    """make_knowledge_base as tax_brain entries ({"question", "answer"})"""
+    return [{"question": q, "answer": f"Answer {i}"} for i, q in enumerate(make_knowledge_base(size, seed))]
+
+def make_queries(questions, count, seed=11):
+    """User-style queries: a known question with words dropped and shuffled"""
+    rng = random.Random(seed)
+    queries = []
+    for question in rng.sample(questions, count):
+        words = question.split()
+        kept = [w for w in words if rng.random() > 0.3] or words
+        rng.shuffle(kept)
+        queries.append(" ".join(kept))
+    return queries
+
+# --- FORM 16 SCANS ---
+def form16_lines(pan, salary, seed=0):
+    """The text printed on a synthetic Form 16 page"""
+    rng = random.Random(seed)
+    return [
+        "FORM NO. 16",
+        "Certificate under section 203 of the Income-tax Act, 1961",
+        f"PAN of the Employee: {pan}",
+        f"TAN of the Deductor: DELA{rng.randint(10000, 99999)}B",
+        "Assessment Year 2025-26",
+        "", "PART A", "Summary of amount paid and tax deducted", "", "", "",
+        "PART B", "Details of Salary Paid and any other income",
+        f"Gross Salary {salary:,}",
+        "Standard deduction under section 16(ia) 75,000",
+        f"Deduction under section 80C {rng.randint(1, 15) * 10000:,}",
+        f"Tax deducted at source {rng.randint(10, 99) * 1000:,}",
+    ]
+
+def make_form16_page(pan, salary, dpi=300, skew=0.0, seed=0):
+    """A synthetic A4 Form 16 scan with a known PAN and gross salary"""
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=max(10, dpi // 7))
+    y = int(dpi * 0.8)
+    for line in form16_lines(pan, salary, seed):
+        draw.text((int(dpi * 0.7), y), line, fill="black", font=font)
+        y += dpi // 4
+    if skew:
+        img = img.rotate(skew, fillcolor="white")
+    return img
+
+def make_form16_text(count, seed=3):
+    """OCR-like text of `count` Form 16 pages (for the field extractor without Tesseract)"""
+    rng = random.Random(seed)
+    return ["\n".join(form16_lines(make_pan(rng), rng.randint(3, 40) * 100000 + rng.randint(0, 99999), seed=i))
+            for i in range(count)]
@@ -0,0 +1,92 @@
+# benchmarks/startup.py
+# Cold-start report for the Streamlit app: how long each feature's imports take
+# in a fresh interpreter (python -X importtime), and which heavy stacks they pull in.
+# "app shell" is what app.py imports on every run; the other stages are loaded
+# by its LAZY LOADERS on first use. "eager (old)" is the import list app.py had
+# before the lazy loaders, for comparison.
+#
+# Usage:
+#   python benchmarks/startup.py                      # table
+#   python benchmarks/startup.py --output startup.json --runs 5
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE = ["streamlit"]  # Already imported by `streamlit run` before app.py starts
+STAGES = {
+    "app shell": ["auth", "models", "metrics"],
+    "filing (Process)": ["api_client", "optimizer"],
+    "what-if": ["whatif"],
+    "OCR (Form 16)": ["local_ai"],
+    "AI Sahayak": ["tax_brain"],
+    "admin records": ["database", "pandas"],
+    "eager (old)": ["auth", "local_ai", "tax_brain", "models", "api_client", "optimizer", "whatif", "metrics",
+                    "database", "pandas"],
+}
+HEAVY = ["pandas", "sklearn", "scipy", "pymongo", "pytesseract", "PIL", "numpy"]
+RUNS = 3
+
+def parse_importtime(stderr):
+    """{top-level module: cumulative microseconds} from -X importtime output"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue  # Nested import (already counted in its parent) or the header line
+        times[name.strip()] = int(cumulative)
+    return times
+
+def measure_stage(modules, base=BASE):
+    """One fresh interpreter: imports base, then modules. Returns (ms for modules, heavy stacks loaded)."""
+    code = (f"import {', '.join(base)}\n" if base else "") + f"import sys, {', '.join(modules)}\n" + \
+           f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    # Top-level entries after the base ones are exactly what `modules` added
+    total_us = sum(us for name, us in parse_importtime(proc.stderr).items() if name not in base)
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return total_us / 1000, loaded
+
+def run(runs=RUNS, stages=STAGES):
+    """Median import time per stage over `runs` fresh interpreters"""
+    results = {}
+    for stage, modules in stages.items():
+        samples, loaded = [], []
+        for _ in range(runs):
+            ms, loaded = measure_stage(modules)
+            samples.append(ms)
+        results[stage] = {"modules": modules, "median_ms": round(statistics.median(samples), 1),
+                          "min_ms": round(min(samples), 1), "heavy_loaded": loaded}
+        print(f"{stage:<20}{results[stage]['median_ms']:>12,.1f}{results[stage]['min_ms']:>12,.1f}   "
+              f"{', '.join(loaded) or '-'}", flush=True)
+    return {"meta": {"timestamp": datetime.now().isoformat(timespec="seconds"), "runs": runs,
+                     "python": sys.version.split()[0]},
+            "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report for the Sahaj Tax AI app")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Fresh interpreters per stage (median is reported)")
+    parser.add_argument("--output", default=None, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    print(f"{'stage':<20}{'median ms':>12}{'min ms':>12}   heavy stacks loaded")
+    report = run(args.runs)
+    shell = report["results"]["app shell"]["median_ms"]
+    eager = report["results"]["eager (old)"]["median_ms"]
+    print(f"\nCold start: {shell:,.0f} ms of imports before the login screen (was {eager:,.0f} ms)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
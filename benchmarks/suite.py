@@ -0,0 +1,281 @@
+# benchmarks/suite.py
+# Performance suite for the core engines: calculators, pipeline, auditor,
+# ITR JSON, AI Sahayak, OCR and the optimizer.
+# For every benchmark it records per-call latency (p50 / p95), throughput and
+# peak traced memory, and writes them as JSON so runs can be compared.
+#
+# Usage:
+#   python benchmarks/suite.py --output results.json               # full run
+#   python benchmarks/suite.py --quick --only calculator,auditor   # smaller inputs, some engines
+#   python benchmarks/suite.py --compare baseline.json             # exit code 1 on a regression
+# Compare runs from the same machine; timings from different hardware are not comparable.
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import generators
+
+REPEAT = 7              # Timed samples per benchmark
+MIN_SAMPLE_TIME = 0.05  # Seconds per sample (fast calls are looped until they take this long)
+TOLERANCE = 0.25        # Allowed slowdown / memory growth before --compare fails
+COMPARED_METRICS = ["p50_us", "peak_kib"]
+
+# --- MEASUREMENT ---
+def measure(fn, items=1, repeat=REPEAT):
+    """
+    Times fn() and traces its peak memory.
+    items = how many returns / queries / pages one call handles (for throughput).
+    """
+    fn()  # Warm-up: imports, caches, lazy index builds
+
+    # Loop fast calls so each sample is long enough for the timer
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= MIN_SAMPLE_TIME or number >= 1 << 20:
+            break
+        number *= 4
+
+    per_call = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - start) / number)
+
+    # Separate traced call: tracemalloc slows Python down, so it must not be timed
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_call.sort()
+    p50 = statistics.median(per_call)
+    return {
+        "p50_us": round(p50 * 1e6, 3),
+        "p95_us": round(per_call[min(len(per_call) - 1, int(0.95 * len(per_call)))] * 1e6, 3),
+        "min_us": round(per_call[0] * 1e6, 3),
+        "items": items,
+        "throughput_per_s": round(items / p50, 1),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+def cycling(values):
+    """fn() that hands out the next input on every call (so caches don't flatter the result)"""
+    it = itertools.cycle(values)
+    return lambda: next(it)
+
+# --- BENCHMARKS ---
+# Each benchmark function takes the scale ("quick" / "full") and yields (name, result).
+BENCHMARKS = {}
+
+def benchmark(group):
+    def register(fn):
+        BENCHMARKS[group] = fn
+        return fn
+    return register
+
+def _sizes(scale, quick, full):
+    return quick if scale == "quick" else full
+
+@benchmark("calculator")
+def bench_calculator(scale):
+    from calculator import calculate_new_regime, calculate_old_regime, calculate_batch
+    next_user = cycling(generators.make_taxpayers(1000))
+    def scalar():
+        user = next_user()
+        calculate_new_regime(user)
+        calculate_old_regime(user)
+    yield "calculator.scalar", measure(scalar)
+
+    size = _sizes(scale, 10000, 1000000)
+    cols = generators.make_taxpayer_columns(size)
+    yield f"calculator.batch_{size}", measure(
+        lambda: calculate_batch(cols["salary_income"], cols["interest_income"], cols["section_80c_deductions"],
+                                cols["section_80d_deductions"]), items=size)
+
+@benchmark("pipeline")
+def bench_pipeline(scale):
+    from pipeline import process_return
+    from peer_stats import PeerStats
+    next_user = cycling(generators.make_taxpayers(1000))
+    peers = PeerStats()  # Audits must not time MongoDB round trips
+    yield "pipeline.process_return", measure(lambda: process_return(next_user(), peer_stats=peers))
+
+@benchmark("auditor")
+def bench_auditor(scale):
+    import pandas as pd
+    from auditor import audit_tax_return, audit_dataframe
+    from pipeline import compute_taxes, build_summary
+    from peer_stats import PeerStats
+    peers = PeerStats()
+    returns = []
+    for user in generators.make_taxpayers(1000):
+        _, _, best_regime, final_tax = compute_taxes(user)
+        returns.append((user, build_summary(user, best_regime, final_tax), peers))
+    next_return = cycling(returns)
+    yield "auditor.single", measure(lambda: audit_tax_return(*next_return()))
+
+    size = _sizes(scale, 10000, 200000)
+    df = pd.DataFrame(generators.make_taxpayer_columns(size))
+    df["pan_number"] = "ABCDE1234F"
+    df["better_regime"] = np.where(df["section_80c_deductions"] > 100000, "Old", "New")
+    yield f"auditor.dataframe_{size}", measure(lambda: audit_dataframe(df, details=False, peer_stats=peers), items=size)
+
+@benchmark("filing")
+def bench_filing(scale):
+    from filing import generate_govt_json, export_itr_batch
+    from pipeline import compute_taxes, build_summary
+    returns = []
+    for user in generators.make_taxpayers(1000):
+        _, _, best_regime, final_tax = compute_taxes(user)
+        returns.append((user, build_summary(user, best_regime, final_tax)))
+    next_return = cycling(returns)
+    yield "filing.pretty", measure(lambda: generate_govt_json(*next_return()))
+    yield "filing.compact", measure(lambda: generate_govt_json(*next_return(), compact=True))
+
+    size = _sizes(scale, 1000, 20000)
+    batch = (returns * (size // len(returns) + 1))[:size]
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "itr.ndjson")
+        yield f"filing.export_ndjson_{size}", measure(lambda: export_itr_batch(batch, path), items=size, repeat=3)
+
+@benchmark("tax_brain")
+def bench_tax_brain(scale):
+    import tax_brain
+    questions = [item["question"] for item in tax_brain.knowledge_base]
+    next_query = cycling(generators.make_queries(questions, min(200, len(questions)), seed=5)
+                         if len(questions) >= 2 else ["What is 80C?"])
+    yield "tax_brain.get_custom_response", measure(lambda: tax_brain.get_custom_response(next_query()))
+
+    # Knowledge base scale-up: same engine, synthetic bases of growing size
+    for size in _sizes(scale, [1000, 10000], [1000, 10000, 100000]):
+        entries = generators.make_knowledge_entries(size)
+        index = tax_brain.KnowledgeIndex().fit(entries)
+        next_query = cycling(generators.make_queries([e["question"] for e in entries], 200))
+        yield f"tax_brain.search_{size}", measure(lambda: index.search(next_query(), 3))
+
+@benchmark("ocr")
+def bench_ocr(scale):
+    from field_extractor import extract_fields
+    from image_prep import preprocess_image
+    next_text = cycling(generators.make_form16_text(200))
+    yield "ocr.extract_fields", measure(lambda: extract_fields(next_text()))
+
+    dpi = _sizes(scale, 150, 300)
+    page = generators.make_form16_page("ABCDE1234F", 1234567, dpi=dpi, skew=1.5)
+    page.info["dpi"] = (dpi, dpi)
+    yield f"ocr.preprocess_{dpi}dpi", measure(lambda: preprocess_image(page), repeat=3)
+
+    # Full extraction only where Tesseract is installed
+    if shutil.which("tesseract"):
+        import local_ai
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "form16.png")
+            page.save(path, dpi=(dpi, dpi))
+            yield f"ocr.ai_extract_data_{dpi}dpi", measure(
+                lambda: local_ai.ai_extract_data(path, use_cache=False, preprocess=True, mode="roi"), repeat=3)
+
+@benchmark("optimizer")
+def bench_optimizer(scale):
+    from optimizer import optimize_batch, optimize_deductions
+    next_user = cycling(generators.make_taxpayers(1000))
+    yield "optimizer.single", measure(lambda: optimize_deductions(next_user()))
+
+    size = _sizes(scale, 10000, 1000000)
+    cols = generators.make_taxpayer_columns(size)
+    yield f"optimizer.batch_{size}", measure(
+        lambda: optimize_batch(cols["salary_income"], cols["interest_income"], cols["section_80c_deductions"],
+                               cols["section_80d_deductions"], cols["age"]), items=size)
+
+# --- RUN / COMPARE ---
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(scale="full", only=None):
+    """Runs the selected benchmark groups. Returns {"meta": ..., "results": {name: metrics}}."""
+    results = {}
+    for group, fn in BENCHMARKS.items():
+        if only and group not in only:
+            continue
+        for name, metrics in fn(scale):
+            results[name] = metrics
+            print(f"{name:<36}{metrics['p50_us']:>14,.1f}{metrics['p95_us']:>14,.1f}"
+                  f"{metrics['throughput_per_s']:>16,.0f}{metrics['peak_kib']:>14,.1f}", flush=True)
+    meta = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "scale": scale,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+    return {"meta": meta, "results": results}
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    """Regressions of current vs. baseline: list of (name, metric, old, new) that grew more than tolerance"""
+    regressions = []
+    for name, metrics in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if old.get(metric) and metrics[metric] > old[metric] * (1 + tolerance):
+                regressions.append((name, metric, old[metric], metrics[metric]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the Sahaj Tax AI engines")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs (for CI)")
+    parser.add_argument("--only", default="", help=f"Comma-separated groups: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", default=None, help="Baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Allowed growth, e.g. 0.25 = 25%%")
+    args = parser.parse_args()
+
+    only = {g.strip() for g in args.only.split(",") if g.strip()}
+    unknown = only - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown group(s): {', '.join(sorted(unknown))}")
+
+    print(f"{'benchmark':<36}{'p50 (us)':>14}{'p95 (us)':>14}{'items/s':>16}{'peak (KiB)':>14}")
+    current = run_suite("quick" if args.quick else "full", only)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != current["meta"]["scale"]:
+            print(f"Warning: baseline was a {baseline['meta'].get('scale')} run, this is a {current['meta']['scale']} run")
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs {args.compare} (tolerance {args.tolerance:.0%}):")
+            for name, metric, old, new in regressions:
+                print(f"  {name:<36}{metric:<10}{old:>14,.1f} -> {new:,.1f}  (+{(new / old - 1):.0%})")
+            sys.exit(1)
+        print(f"✅ No regressions vs {args.compare} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
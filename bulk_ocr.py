@@ -0,0 +1,158 @@
+# bulk_ocr.py
+# Bulk Form 16 extraction for employer onboarding.
+# Fans a folder of scans out over a process pool, streams results back as they
+# finish and appends them to a JSONL file. Re-running with the same results
+# file skips everything that already finished.
+#
+# Usage: python bulk_ocr.py scans/ --out form16_results.jsonl --workers 8 --timeout 60
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from local_ai import ai_extract_data
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".pdf"}
+DEFAULT_TIMEOUT = 60    # Wall-clock seconds per file (OCR passes + PDF rendering) before its worker is killed
+
+def find_images(folder):
+    """All Form 16 scans (images and PDFs) under a folder, in a stable order"""
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                yield os.path.join(root, name)
+
+def load_finished(results_path, retry_failed=True):
+    """Files already in the results file (failed ones are retried unless retry_failed=False)"""
+    finished = set()
+    if not os.path.exists(results_path):
+        return finished
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # Half-written last line from an interrupted run
+            if not (retry_failed and row.get("error")):
+                finished.add(row["file"])
+    return finished
+
+def _extract_one(path, timeout):
+    """Runs in a worker process. Never raises: errors are returned in the result."""
+    start = time.perf_counter()
+    try:
+        result = ai_extract_data(path, timeout=timeout)
+    except Exception as e:
+        result = {"error": str(e)}
+    result["file"] = path
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def _shutdown(executor, kill=False):
+    """Stops a pool without waiting. kill=True also terminates workers still busy on a file."""
+    if kill:
+        # shutdown() on its own leaves a hung worker running forever
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def bulk_extract(paths, results_path, workers=None, timeout=DEFAULT_TIMEOUT, retry_failed=True, keep_text=True):
+    """
+    Extracts every image in `paths` and appends one JSON line per file to results_path.
+    Yields each result as soon as it finishes (in completion order).
+    A file that crashes or hangs only fails itself; the rest of the batch carries on.
+    timeout: wall-clock seconds per file (0 = no limit). A file past its deadline is
+    written as failed and the pool is recycled; the other files in flight are resubmitted.
+    """
+    workers = workers or os.cpu_count() or 1
+    finished = load_finished(results_path, retry_failed)
+    todo = (os.path.abspath(p) for p in paths)
+    todo = (p for p in todo if p not in finished)
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    in_flight = {}   # future -> (path, deadline)
+    retry = []       # Files cut short by a pool recycle (not their fault)
+
+    def submit(path):
+        # One file per worker, so a file's clock only runs while a worker is on it
+        deadline = time.monotonic() + timeout if timeout else math.inf
+        in_flight[executor.submit(_extract_one, path, timeout)] = (path, deadline)
+
+    try:
+        with open(results_path, "a", encoding="utf-8") as out:
+            while True:
+                # Keep the pool fed without materialising the whole folder
+                while len(in_flight) < workers:
+                    path = retry.pop() if retry else next(todo, None)
+                    if path is None:
+                        break
+                    submit(path)
+                if not in_flight:
+                    break
+
+                next_deadline = min(deadline for _, deadline in in_flight.values())
+                wait_for = None if next_deadline == math.inf else max(0.0, next_deadline - time.monotonic())
+                done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                expired = [f for f, (_, deadline) in in_flight.items() if f not in done and deadline <= now]
+
+                results = []
+                pool_broken = False
+                for future in done:
+                    path, _ = in_flight.pop(future)
+                    try:
+                        results.append(future.result())
+                    except BrokenProcessPool:
+                        pool_broken = True
+                        results.append({"file": path, "error": "Worker process crashed"})
+                    except Exception as e:
+                        results.append({"file": path, "error": str(e)})
+                for future in expired:
+                    path, _ = in_flight.pop(future)
+                    results.append({"file": path, "error": f"Timed out after {timeout:g}s"})
+
+                for result in results:
+                    if not keep_text:
+                        result.pop("text", None)
+                    out.write(json.dumps(result) + "\n")
+                    out.flush()
+                    yield result
+
+                # A hard crash (e.g. segfault) breaks the whole pool, and a hung file keeps its worker busy:
+                # either way start a fresh pool. Files that crashed are written as failed and retried on the
+                # next run; files still running elsewhere in the old pool are resubmitted now.
+                if pool_broken or expired:
+                    retry.extend(path for path, _ in in_flight.values())
+                    in_flight.clear()
+                    _shutdown(executor, kill=True)
+                    executor = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        _shutdown(executor, kill=bool(in_flight))  # Stopped early: don't leave workers running
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk Form 16 OCR extraction")
+    parser.add_argument("folder", help="Folder of Form 16 scans")
+    parser.add_argument("--out", default="form16_results.jsonl", help="JSONL results file (also used to resume)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Wall-clock seconds per file (0 = no limit)")
+    parser.add_argument("--no-retry", action="store_true", help="Do not retry files that failed in a previous run")
+    parser.add_argument("--no-text", action="store_true", help="Do not store the raw OCR text")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ok = failed = 0
+    for result in bulk_extract(find_images(args.folder), args.out, args.workers, args.timeout,
+                               retry_failed=not args.no_retry, keep_text=not args.no_text):
+        if result.get("error"):
+            failed += 1
+            print(f"❌ {result['file']}: {result['error']}")
+        else:
+            ok += 1
+            print(f"✅ {result['file']}: PAN={result.get('pan') or '-'} Salary={result.get('salary', 0):,.0f}")
+    elapsed = time.perf_counter() - start
+    print(f"Done: {ok} extracted, {failed} failed in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,79 @@
 # calculator.py
 from models import TaxPayer
+from tax_schedules import get_schedule
+import numpy as np
 
-def calculate_new_regime(user: TaxPayer) -> float:
-    # New Regime (FY 2024-25 Slaps - simplified for demo)
-    # 0-3L: Nil, 3-7L: 5%, 7-10L: 10%, 10-12L: 15%, 12-15L: 20%, >15L: 30%
-    taxable_income = user.salary_income + user.interest_income - 75000 # Standard Deduction
-    
-    if taxable_income <= 300000:
-        return 0.0
-    
-    tax = 0.0
-    # Simple slab logic (You can expand this later)
-    if taxable_income > 300000:
-        # Tax for 3L to 7L (5%)
-        tax += (min(taxable_income, 700000) - 300000) * 0.05
-    if taxable_income > 700000:
-        # Tax for 7L to 10L (10%)
-        tax += (min(taxable_income, 1000000) - 700000) * 0.10
-    if taxable_income > 1000000:
-        # Tax for 10L to 12L (15%)
-        tax += (min(taxable_income, 1200000) - 1000000) * 0.15
-        
-    # Rebate u/s 87A for income up to 7L
-    if taxable_income <= 700000:
-        return 0.0
-        
-    return tax
-
-def calculate_old_regime(user: TaxPayer) -> float:
+# Slab boundaries, rates, standard deductions and the 87A rebate all live in
+# tax_schedules.py (one table per Assessment Year).
+
+def calculate_new_regime(user: TaxPayer, assessment_year: str = None) -> float:
+    # New Regime: Standard Deduction only, no 80C / 80D
+    schedule = get_schedule("new", assessment_year)
+    taxable_income = schedule.taxable_income(user.salary_income + user.interest_income)
+    return schedule.tax_on(taxable_income)
+
+def calculate_old_regime(user: TaxPayer, assessment_year: str = None) -> float:
     # Old Regime allows deductions (80C, 80D)
-    deductions = min(user.section_80c_deductions, 150000) + user.section_80d_deductions + 50000 # Std Ded
-    taxable_income = (user.salary_income + user.interest_income) - deductions
-    
-    # Old Regime Slabs (Simplified)
-    # 0-2.5L: Nil, 2.5-5L: 5%, 5-10L: 20%, >10L: 30%
-    if taxable_income <= 250000:
-        return 0.0
-        
-    tax = 0.0
-    if taxable_income > 250000:
-         tax += (min(taxable_income, 500000) - 250000) * 0.05
-    if taxable_income > 500000:
-         tax += (min(taxable_income, 1000000) - 500000) * 0.20
-    if taxable_income > 1000000:
-         tax += (taxable_income - 1000000) * 0.30
-         
-    # Rebate u/s 87A for income up to 5L
-    if taxable_income <= 500000:
-        return 0.0
-        
-    return tax
\ No newline at end of file
+    schedule = get_schedule("old", assessment_year)
+    taxable_income = schedule.taxable_income(user.salary_income + user.interest_income,
+                                             user.section_80c_deductions, user.section_80d_deductions)
+    return schedule.tax_on(taxable_income)
+
+
+# --- BATCH ENGINE (Vectorized) ---
+# Same schedules as above, but over whole columns at once.
+# Used for year-end recomputation where building a TaxPayer per row is too slow.
+
+def _as_columns(*values):
+    """
+    Turns scalars / lists / Series (None = 0) into float64 NumPy columns of one common length.
+    Inputs are broadcast together, so a scalar salary with an array of 80C amounts gives one row per amount.
+    """
+    columns = [np.zeros(1) if v is None else np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in values]
+    return np.broadcast_arrays(*columns)  # Read-only views, no copies; the engines never write to their inputs
+
+def calculate_new_regime_batch(salary, interest=None, assessment_year=None):
+    """Vectorized version of calculate_new_regime (returns an array of taxes)"""
+    schedule = get_schedule("new", assessment_year)
+    salary, interest = _as_columns(salary, interest)
+    return schedule.tax_on_array(salary + interest - schedule.standard_deduction)
+
+def calculate_old_regime_batch(salary, interest=None, section_80c=None, section_80d=None, assessment_year=None):
+    """Vectorized version of calculate_old_regime (returns an array of taxes)"""
+    schedule = get_schedule("old", assessment_year)
+    salary, interest, section_80c, section_80d = _as_columns(salary, interest, section_80c, section_80d)
+
+    # Same operation order as TaxSchedule.taxable_income so the floats match exactly
+    deductions = np.minimum(section_80c, schedule.section_80c_cap) + section_80d + schedule.standard_deduction
+    return schedule.tax_on_array((salary + interest) - deductions)
+
+def calculate_batch(salary, interest=None, section_80c=None, section_80d=None, assessment_year=None):
+    """
+    Computes both regimes for many taxpayers in one pass.
+    Returns a dict of arrays: tax_old, tax_new, better_regime ("New" / "Old").
+    """
+    salary, interest, section_80c, section_80d = _as_columns(salary, interest, section_80c, section_80d)
+    tax_new = calculate_new_regime_batch(salary, interest, assessment_year)
+    tax_old = calculate_old_regime_batch(salary, interest, section_80c, section_80d, assessment_year)
+    # Same tie-break as the app: New only if it is strictly cheaper
+    better_regime = np.where(tax_new < tax_old, "New", "Old")
+    return {"tax_old": tax_old, "tax_new": tax_new, "better_regime": better_regime}
+
+def calculate_dataframe(df, assessment_year=None):
+    """
+    DataFrame wrapper around calculate_batch.
+    Expects TaxPayer column names (salary_income, interest_income,
+    section_80c_deductions, section_80d_deductions); missing optional columns count as 0.
+    Returns a new DataFrame with tax_old, tax_new and better_regime columns added.
+    """
+    result = calculate_batch(
+        df["salary_income"].to_numpy(),
+        df["interest_income"].to_numpy() if "interest_income" in df else None,
+        df["section_80c_deductions"].to_numpy() if "section_80c_deductions" in df else None,
+        df["section_80d_deductions"].to_numpy() if "section_80d_deductions" in df else None,
+        assessment_year=assessment_year,
+    )
+    out = df.copy()
+    for column, values in result.items():
+        out[column] = values
+    return out
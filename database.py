@@ -1,24 +1,173 @@
 # database.py
+import os
+import threading
+import time
 import pymongo
+from pymongo import monitoring
 from datetime import datetime
 import streamlit as st
+from metrics import span, increment
 
 # --- CONNECTION SETTINGS ---
 # This connects to the MongoDB running on your laptop
-DB_URI = "mongodb://localhost:27017/"
+DB_URI = os.environ.get("SAHAJ_DB_URI", "mongodb://localhost:27017/")
 DB_NAME = "sahaj_tax_db"
 COLLECTION_NAME = "user_records"
 
+# --- POOL SETTINGS ---
+MAX_POOL_SIZE = 50
+HEALTH_CHECK_INTERVAL = 30   # Seconds between pings while the server is healthy
+BACKOFF_INITIAL = 1          # Seconds to wait before retrying after a failure...
+BACKOFF_MAX = 60             # ...doubling up to this limit
+
+PAGE_SIZE = 50               # Records per page in the admin Tax Records tab
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events (pymongo calls these from its own threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "checkout_failures": 0,
+            "pool_clears": 0,
+        }
+
+    def _bump(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def pool_cleared(self, event): self._bump("pool_clears")
+    def connection_created(self, event): self._bump("connections_created")
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): self._bump("connections_closed")
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): self._bump("checkout_failures")
+    def connection_checked_out(self, event): self._bump("checkouts")
+    def connection_checked_in(self, event): self._bump("checkins")
+
+_pool_metrics = PoolMetrics()
+
+def _default_client_factory():
+    return pymongo.MongoClient(DB_URI, serverSelectionTimeoutMS=2000, maxPoolSize=MAX_POOL_SIZE,
+                               event_listeners=[_pool_metrics])
+
+# Process-wide client, shared by every Streamlit session and rerun
+_client = None
+_client_factory = _default_client_factory
+_lock = threading.Lock()   # Guards the state below; never held during network calls
+# up = the last health check succeeded; checking = a health check is running (single flight);
+# generation changes on close_connection so a check that started before it is discarded
+_health = {"healthy_until": 0.0, "retry_at": 0.0, "backoff": BACKOFF_INITIAL, "consecutive_failures": 0,
+           "up": False, "checking": False, "generation": 0}
+_indexes_ready = False
+
+def set_client_factory(factory):
+    """
+    Swaps how the client is built, e.g. set_client_factory(mongomock.MongoClient) in tests.
+    Drops the current client so the next call uses the new factory.
+    """
+    global _client_factory
+    close_connection()
+    _client_factory = factory or _default_client_factory
+
+def close_connection():
+    """Closes the shared client (it is recreated on next use)"""
+    global _client, _indexes_ready
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _indexes_ready = False
+        _health.update(healthy_until=0.0, retry_at=0.0, backoff=BACKOFF_INITIAL, consecutive_failures=0,
+                       up=False, checking=False, generation=_health["generation"] + 1)
+
+def report_failure():
+    """Marks the server as down so callers back off instead of stalling on every request"""
+    with _lock:
+        _mark_down(time.monotonic())
+
+def _mark_down(now):
+    increment("db.failure")
+    _health["up"] = False
+    _health["healthy_until"] = 0.0
+    _health["retry_at"] = now + _health["backoff"]
+    _health["backoff"] = min(_health["backoff"] * 2, BACKOFF_MAX)
+    _health["consecutive_failures"] += 1
+
 def get_connection():
-    """Establishes connection to MongoDB"""
+    """
+    Returns the records collection from the shared, pooled client.
+    The server is pinged at most every HEALTH_CHECK_INTERVAL seconds, by one
+    caller at a time and outside the lock: while that ping runs, everyone else
+    gets the last known state straight away (the collection if the server was
+    up, None if it was down or never reached). After a failure we return None
+    straight away until the backoff period has passed.
+    """
+    global _client, _indexes_ready
+    now = time.monotonic()
+    with _lock:
+        if now < _health["retry_at"]:
+            return None
+        if now < _health["healthy_until"] or _health["checking"]:
+            return _client[DB_NAME][COLLECTION_NAME] if _health["up"] and _client is not None else None
+        _health["checking"] = True
+        client, generation, indexes_ready = _client, _health["generation"], _indexes_ready
+
+    # Only this caller gets here until the check is finished
+    ok = False
     try:
-        client = pymongo.MongoClient(DB_URI, serverSelectionTimeoutMS=2000)
-        # Check if server is available
-        client.server_info()
-        db = client[DB_NAME]
-        return db[COLLECTION_NAME]
+        if client is None:
+            client = _client_factory()
+        with span("db.ping"):
+            client.admin.command("ping")
+        collection = client[DB_NAME][COLLECTION_NAME]
+        # Indexes are created once per process, on the first successful connection
+        if not indexes_ready:
+            ensure_indexes(collection)
+        ok = True
     except Exception:
-        return None
+        pass
+
+    with _lock:
+        if generation != _health["generation"]:
+            # close_connection() ran meanwhile: this client is stale
+            if client is not _client and client is not None:
+                client.close()
+            return None
+        _health["checking"] = False
+        _client = client
+        if not ok:
+            # Back off from the end of the failed attempt, not the start
+            _mark_down(time.monotonic())
+            return None
+        _indexes_ready = True
+        _health.update(healthy_until=now + HEALTH_CHECK_INTERVAL, backoff=BACKOFF_INITIAL, consecutive_failures=0,
+                       up=True)
+        return collection
+
+def ensure_indexes(collection):
+    """Indexes used by the paginated records queries (no-op if they already exist)"""
+    collection.create_index([("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)], name="created_at_id")
+    collection.create_index("pan", name="pan")
+
+def get_pool_stats():
+    """Connection pool and health metrics (for dashboards / debugging)"""
+    now = time.monotonic()
+    stats = dict(_pool_metrics.counters)
+    stats["connections_open"] = stats["connections_created"] - stats["connections_closed"]
+    stats["connections_in_use"] = stats["checkouts"] - stats["checkins"]
+    stats["max_pool_size"] = MAX_POOL_SIZE
+    stats["healthy"] = now < _health["healthy_until"]
+    stats["consecutive_failures"] = _health["consecutive_failures"]
+    stats["retry_in_seconds"] = max(0.0, _health["retry_at"] - now)
+    return stats
 
 def save_tax_record(data):
     """Saves a user's tax calculation to the DB"""
@@ -26,7 +175,14 @@ def save_tax_record(data):
     if collection is not None:
         # Add a timestamp
         data["created_at"] = datetime.now()
-        collection.insert_one(data)
+        try:
+            with span("db.insert"):
+                collection.insert_one(data)
+        except pymongo.errors.PyMongoError:
+            report_failure()
+            raise
+        from peer_stats import record_peer_stats  # peer_stats imports this module
+        record_peer_stats([data], collection)
         return True
     return False
 
@@ -35,6 +191,136 @@ def get_all_records():
     collection = get_connection()
     if collection is not None:
         # Get records, hide the internal MongoDB '_id', and sort by newest first
-        records = list(collection.find({}, {"_id": 0}).sort("created_at", -1))
+        try:
+            records = list(collection.find({}, {"_id": 0}).sort("created_at", -1))
+        except pymongo.errors.PyMongoError:
+            report_failure()
+            raise
         return records
-    return []
\ No newline at end of file
+    return []
+
+def _build_filter(pan=None, status=None, date_from=None, date_to=None):
+    """Server-side filter for the records queries"""
+    query = {}
+    if pan:
+        query["pan"] = pan
+    if status:
+        query["status"] = status
+    if date_from or date_to:
+        query["created_at"] = {}
+        if date_from:
+            query["created_at"]["$gte"] = date_from
+        if date_to:
+            query["created_at"]["$lt"] = date_to
+    return query
+
+def get_records_page(cursor=None, page_size=PAGE_SIZE, pan=None, status=None, date_from=None, date_to=None, fields=None):
+    """
+    Fetches one page of records, newest first, using keyset pagination on (created_at, _id).
+    - cursor: None for the first page, otherwise the `next_cursor` returned by the previous call
+    - pan / status / date_from / date_to: filters (date_to is exclusive)
+    - fields: only return these fields (None = everything)
+    Returns (records, next_cursor); next_cursor is None on the last page.
+    """
+    collection = get_connection()
+    if collection is None:
+        return [], None
+
+    query = _build_filter(pan, status, date_from, date_to)
+    if cursor is not None:
+        # Everything strictly "after" the last record of the previous page in the sort order
+        last_created_at, last_id = cursor
+        after = {"$or": [
+            {"created_at": {"$lt": last_created_at}},
+            {"created_at": last_created_at, "_id": {"$lt": last_id}},
+        ]}
+        query = {"$and": [query, after]} if query else after
+
+    # created_at and _id are always fetched, the cursor is built from them
+    projection = None
+    if fields is not None:
+        projection = {field: 1 for field in fields}
+        projection["created_at"] = 1
+
+    try:
+        # One extra record tells us whether there is a next page
+        with span("db.find_page"):
+            docs = list(collection.find(query, projection)
+                        .sort([("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+                        .limit(page_size + 1))
+    except pymongo.errors.PyMongoError:
+        report_failure()
+        raise
+
+    next_cursor = None
+    if len(docs) > page_size:
+        docs = docs[:page_size]
+        next_cursor = (docs[-1].get("created_at"), docs[-1]["_id"])
+
+    # Hide the internal MongoDB '_id' like get_all_records does
+    for doc in docs:
+        doc.pop("_id", None)
+        if fields is not None and "created_at" not in fields:
+            doc.pop("created_at", None)
+    return docs, next_cursor
+
+# --- DASHBOARD STATISTICS (computed by MongoDB, only summary rows come back) ---
+INCOME_BANDS = [0, 500000, 1000000, 1500000, 2500000, 5000000]
+DAILY_STATS_DAYS = 30
+
+def get_dashboard_stats(pan=None, status=None, date_from=None, date_to=None):
+    """
+    KPIs for the admin dashboard in one aggregation pipeline:
+    totals, tax by regime, income distribution and filings per day.
+    Takes the same filters as get_records_page.
+    """
+    empty = {"totals": {"filings": 0, "total_tax": 0, "total_income": 0, "avg_tax": 0},
+             "by_regime": [], "income_distribution": [], "filings_per_day": []}
+    collection = get_connection()
+    if collection is None:
+        return empty
+
+    pipeline = [
+        {"$match": _build_filter(pan, status, date_from, date_to)},
+        {"$facet": {
+            "totals": [
+                {"$group": {"_id": None, "filings": {"$sum": 1}, "total_tax": {"$sum": "$tax"},
+                            "total_income": {"$sum": "$income"}, "avg_tax": {"$avg": "$tax"}}},
+            ],
+            "by_regime": [
+                {"$group": {"_id": {"$ifNull": ["$regime", "Unknown"]}, "filings": {"$sum": 1},
+                            "total_tax": {"$sum": "$tax"}}},
+                {"$sort": {"_id": 1}},
+            ],
+            "income_distribution": [
+                {"$bucket": {"groupBy": "$income", "boundaries": INCOME_BANDS, "default": "50L+",
+                             "output": {"filings": {"$sum": 1}, "total_tax": {"$sum": "$tax"}}}},
+            ],
+            "filings_per_day": [
+                {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                            "filings": {"$sum": 1}, "total_tax": {"$sum": "$tax"}}},
+                {"$sort": {"_id": -1}},
+                {"$limit": DAILY_STATS_DAYS},
+            ],
+        }},
+    ]
+    try:
+        with span("db.dashboard_stats"):
+            result = next(collection.aggregate(pipeline), None)
+    except pymongo.errors.PyMongoError:
+        report_failure()
+        raise
+    if not result:
+        return empty
+
+    def rows(facet, key):
+        return [{key: row["_id"], **{k: v for k, v in row.items() if k != "_id"}} for row in result[facet]]
+
+    totals = result["totals"][0] if result["totals"] else empty["totals"]
+    totals.pop("_id", None)
+    return {
+        "totals": totals,
+        "by_regime": rows("by_regime", "regime"),
+        "income_distribution": rows("income_distribution", "income_from"),
+        "filings_per_day": sorted(rows("filings_per_day", "day"), key=lambda row: row["day"]),
+    }
@@ -0,0 +1,95 @@
+# field_extractor.py
+# Finds labelled amounts in Form 16 text in a single pass.
+# All labels are compiled into ONE regex; every match captures the label and
+# the rest of its line, and the amount is the last number on that line
+# (Form 16 prints amounts in the right-hand column).
+import re
+
+# Field -> [(label regex, confidence)]. Field names match TaxPayer where one exists.
+# More specific labels come first: at the same position the regex takes the first alternative.
+FIELD_LABELS = [
+    ("salary_income", r"gross\s+salary", 0.95),
+    # Salary after the standard deduction, and salary plus other income: related, but not the gross salary
+    ("income_chargeable_salaries", r"income\s+chargeable\s+under\s+the\s+head\s+.?salaries", 0.9),
+    ("gross_total_income", r"gross\s+total\s+income", 0.9),
+    ("salary_income", r"total\s+salary", 0.75),
+    ("standard_deduction", r"standard\s+deduction", 0.95),
+    ("section_80c_deductions", r"(?:section|sec\.?|u/s)\s*80\s*C\b", 0.9),
+    ("section_80d_deductions", r"(?:section|sec\.?|u/s)\s*80\s*D\b", 0.9),
+    ("section_80d_deductions", r"health\s+insurance|mediclaim", 0.6),
+    ("tds", r"tax\s+deducted\s+at\s+source|\bTDS\b", 0.9),
+    ("tds", r"tax\s+deducted", 0.7),
+    ("interest_income", r"interest\s+on\s+(?:savings|(?:fixed\s+)?deposits?)", 0.85),
+    ("interest_income", r"interest\s+income", 0.8),
+    ("salary_income", r"net\s+pay|salary|income|total", 0.4),  # The old keyword list, as a last resort
+]
+
+# Values below this are unlikely to be the field (years, section numbers, serial numbers)
+MIN_VALUES = {"salary_income": 50000, "income_chargeable_salaries": 50000, "gross_total_income": 50000}
+
+# 12,34,567 / 1,234,567 / 1234567 / 1234567.50 (optionally after Rs. / INR / ₹)
+AMOUNT_PATTERN = re.compile(r"(?<![\w.,])(\d{1,3}(?:,\d{2,3})+|\d+)(\.\d{1,2})?(?![\w,])")
+
+# Confidence multiplier when the amount is on the line after the label ("1. Gross Salary" / "... 12,34,567")
+NEXT_LINE_FACTOR = 0.8
+
+# (label_0|label_1|...) followed by the rest of the line, plus a peek at the next line
+# (the lookahead does not consume it, so labels on the next line are still matched)
+_LABEL_PATTERN = re.compile(
+    "(?:" + "|".join(f"(?P<f{i}>{label})" for i, (_, label, _) in enumerate(FIELD_LABELS)) + r")"
+    r"(?P<rest>[^\n]*)(?=\n?(?P<next>[^\n]*))",
+    re.IGNORECASE,
+)
+_LABEL_GROUPS = [f"f{i}" for i in range(len(FIELD_LABELS))]
+# Labels at or below this confidence are a last resort ("salary", "total"): they are matched,
+# but a next line containing one of those words can still hold the amount of the line above
+CATCH_ALL_CONFIDENCE = 0.4
+# Any real label: a next line that has one holds its own field's amount, not ours
+_ANY_LABEL = re.compile("|".join(label for _, label, conf in FIELD_LABELS if conf > CATCH_ALL_CONFIDENCE),
+                        re.IGNORECASE)
+
+def _parse_amount(match):
+    return float(match.group(1).replace(",", "") + (match.group(2) or ""))
+
+def extract_fields(text):
+    """
+    Every labelled amount in the text, best first per field:
+    {field: [{"value", "confidence", "label", "line"}, ...]}
+    """
+    candidates = {}
+    line, counted_to = 1, 0
+    for match in _LABEL_PATTERN.finditer(text):
+        i = next(i for i, group in enumerate(_LABEL_GROUPS) if match.group(group) is not None)
+        field, _, confidence = FIELD_LABELS[i]
+        line += text.count("\n", counted_to, match.start())
+        counted_to = match.start()
+
+        amounts = list(AMOUNT_PATTERN.finditer(match.group("rest")))
+        next_line = match.group("next") or ""
+        if not amounts and not _ANY_LABEL.search(next_line):
+            amounts = list(AMOUNT_PATTERN.finditer(next_line))
+            confidence *= NEXT_LINE_FACTOR
+        if not amounts:
+            continue
+        value = _parse_amount(amounts[-1])
+        if value < MIN_VALUES.get(field, 0):
+            continue
+        # Amounts printed with separators or paise look more like money than bare numbers
+        if "," not in amounts[-1].group(0) and "." not in amounts[-1].group(0):
+            confidence *= 0.9
+
+        candidates.setdefault(field, []).append({
+            "value": value,
+            "confidence": round(confidence, 3),
+            "label": match.group(_LABEL_GROUPS[i]),
+            "line": line,
+        })
+
+    for field in candidates:
+        # Best confidence first; among equals, the earliest line
+        candidates[field].sort(key=lambda c: (-c["confidence"], c["line"]))
+    return candidates
+
+def best_fields(candidates):
+    """The top candidate value for each field"""
+    return {field: options[0]["value"] for field, options in candidates.items() if options}
@@ -1,20 +1,91 @@
 # filing.py
 import json
+import math
+import os
 import uuid
+import zipfile
 from datetime import datetime
+from tax_schedules import DEFAULT_ASSESSMENT_YEAR, get_schedule
+
+# Optional fast JSON backend for compact output (pip install orjson)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SCHEMA_VERSION = "ITR-1_v2.0"
+STABLE_ID_NAMESPACE = uuid.UUID("6f1c3f2e-5b8a-4d7e-9c1a-2a4e8b7d9f10")
+
+# --- ID / CLOCK PROVIDERS ---
+# id_provider(user_data, tax_summary) -> str and clock() -> datetime can be swapped
+# for reproducible output (tests, re-generated batches).
+
+def random_submission_id(user_data, tax_summary):
+    """A new random ID for every filing (the default)"""
+    return str(uuid.uuid4())
+
+def stable_submission_id(user_data, tax_summary):
+    """Same return -> same ID (PAN, assessment year, regime and tax)"""
+    key = "|".join(str(v) for v in (user_data.pan_number, tax_summary.get("assessment_year", DEFAULT_ASSESSMENT_YEAR),
+                                     tax_summary["selected_regime"], tax_summary["final_tax"]))
+    return str(uuid.uuid5(STABLE_ID_NAMESPACE, key))
+
+def fixed_clock(timestamp):
+    """A clock that always returns the given datetime (or ISO string)"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return lambda: timestamp
+
+# --- SCHEMA ---
+# section -> field -> allowed types. Every field is required; no extra fields are allowed.
+NUMBER = (int, float)
+ITR_SCHEMA = {
+    "filing_metadata": {"assessment_year": str, "schema_version": str, "submission_id": str, "timestamp": str},
+    "taxpayer_profile": {"pan": str, "name": str, "age": int, "status": str},
+    "income_details": {"gross_salary": NUMBER, "exempt_income": NUMBER, "net_taxable_income": NUMBER},
+    "deductions": {"section_80c": NUMBER, "section_80d": NUMBER, "total_deductions": NUMBER},
+    "tax_computation": {"regime_selected": str, "tax_payable": NUMBER, "cess": NUMBER, "total_liability": NUMBER},
+    "verification": {"declaration": str, "verified_by_ai": bool, "risk_score": NUMBER},
+}
+
+def validate_itr_payload(payload):
+    """Checks a payload against ITR_SCHEMA. Raises ValueError listing every problem."""
+    errors = []
+    if set(payload) != set(ITR_SCHEMA):
+        errors.append(f"sections {sorted(payload)} != {sorted(ITR_SCHEMA)}")
+    for section, fields in ITR_SCHEMA.items():
+        values = payload.get(section)
+        if not isinstance(values, dict):
+            continue
+        if set(values) != set(fields):
+            errors.append(f"{section}: fields {sorted(values)} != {sorted(fields)}")
+        for field, types in fields.items():
+            if field not in values:
+                continue
+            value = values[field]
+            # bool is an int in Python; only accept it where the schema says bool
+            if not isinstance(value, types) or (isinstance(value, bool) and types is not bool):
+                errors.append(f"{section}.{field}: unexpected {type(value).__name__}")
+            elif isinstance(value, float) and not math.isfinite(value):
+                errors.append(f"{section}.{field}: not a finite number")
+    if errors:
+        raise ValueError("Invalid ITR payload: " + "; ".join(errors))
+    return payload
+
+def build_itr_payload(user_data, tax_summary, id_provider=random_submission_id, clock=datetime.now):
+    """The ITR payload as a dict (see generate_govt_json)"""
+    # Assessment Year comes from the summary (defaults to the current year in the registry)
+    assessment_year = tax_summary.get("assessment_year", DEFAULT_ASSESSMENT_YEAR)
+    # Deductions as the selected regime allows them (none in the New Regime), matching the computed tax
+    schedule = get_schedule(tax_summary["selected_regime"], assessment_year)
 
-def generate_govt_json(user_data, tax_summary):
-    """
-    Generates the Standard ITR JSON Payload for Government Integration.
-    """
-    
     # This structure mimics the official schema used by Income Tax Dept APIs
-    itr_payload = {
+    return {
         "filing_metadata": {
-            "assessment_year": "2025-26",
-            "schema_version": "ITR-1_v2.0",
-            "submission_id": str(uuid.uuid4()), # Unique ID for this filing
-            "timestamp": datetime.now().isoformat()
+            "assessment_year": assessment_year,
+            "schema_version": SCHEMA_VERSION,
+            "submission_id": id_provider(user_data, tax_summary), # Unique ID for this filing
+            "timestamp": clock().isoformat()
         },
         "taxpayer_profile": {
             "pan": user_data.pan_number,
@@ -28,8 +99,8 @@ def generate_govt_json(user_data, tax_summary):
             "net_taxable_income": tax_summary["taxable_income"]
         },
         "deductions": {
-            "section_80c": min(user_data.section_80c_deductions, 150000),
-            "section_80d": user_data.section_80d_deductions,
+            "section_80c": min(user_data.section_80c_deductions, schedule.section_80c_cap),
+            "section_80d": user_data.section_80d_deductions if schedule.allows_deductions else 0.0,
             "total_deductions": tax_summary["total_deductions"]
         },
         "tax_computation": {
@@ -44,6 +115,104 @@ def generate_govt_json(user_data, tax_summary):
             "risk_score": tax_summary.get("audit_score", 0)
         }
     }
-    
+
+def _plain_floats(values):
+    """True if json prints every float in these dict values / list items without an exponent"""
+    for value in values:
+        kind = type(value)
+        if kind is float:
+            # json (repr) switches to 1e+16 / 1e-05 outside this range; orjson formats those differently
+            if value and not 1e-4 <= abs(value) < 1e16:
+                return False
+        elif kind is dict:
+            if not _plain_floats(value.values()):
+                return False
+        elif kind is list or kind is tuple:
+            if not _plain_floats(value):
+                return False
+    return True
+
+def dumps_compact(payload):
+    """
+    One-line JSON, no whitespace, UTF-8 text. Same text with or without orjson:
+    payloads with floats the two format differently (1e+16 vs 1e16, 1e-05 vs
+    0.00001, NaN / infinity) go through json.
+    """
+    if orjson is not None and _plain_floats(payload.values()):
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+
+def generate_govt_json(user_data, tax_summary, compact=False, id_provider=random_submission_id,
+                       clock=datetime.now, validate=None):
+    """
+    Generates the Standard ITR JSON Payload for Government Integration.
+    compact=True gives one schema-validated line (for bulk export); the default
+    is the indented JSON shown to users.
+    """
+    itr_payload = build_itr_payload(user_data, tax_summary, id_provider, clock)
+    if compact if validate is None else validate:
+        validate_itr_payload(itr_payload)
+    if compact:
+        return dumps_compact(itr_payload)
+
     # Convert to JSON string
-    return json.dumps(itr_payload, indent=4)
\ No newline at end of file
+    return json.dumps(itr_payload, indent=4)
+
+# --- BULK EXPORT ---
+class ITRExporter:
+    """
+    Streams ITR JSON documents into one file, one return at a time:
+    "ndjson" = one compact document per line, "zip" = one ITR_<n>_<PAN>.json per return.
+    Use as a context manager; nothing is kept in memory between returns.
+    """
+
+    def __init__(self, path, export_format=None):
+        self.path = path
+        self.format = export_format or ("zip" if path.lower().endswith(".zip") else "ndjson")
+        if self.format not in ("ndjson", "zip"):
+            raise ValueError(f"Unknown export format: {self.format}")
+        self.count = 0
+        tmp_path = path + ".tmp"
+        if self.format == "zip":
+            self._out = zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self._out = open(tmp_path, "w", encoding="utf-8", newline="\n")
+
+    def add(self, itr_json, pan="", name=None):
+        """Adds one ITR JSON string (compact for NDJSON; any JSON for zip)"""
+        self.count += 1
+        if self.format == "zip":
+            self._out.writestr(name or f"ITR_{self.count:07d}_{pan}.json", itr_json)
+        else:
+            self._out.write(itr_json + "\n")
+
+    def close(self):
+        """Finishes the file; it only appears at `path` once complete"""
+        if self._out is None:
+            return
+        self._out.close()
+        self._out = None
+        os.replace(self.path + ".tmp", self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._out is not None:
+            # Failed export: don't leave a half-written file behind
+            self._out.close()
+            self._out = None
+            os.remove(self.path + ".tmp")
+
+def export_itr_batch(returns, path, export_format=None, id_provider=random_submission_id, clock=datetime.now):
+    """
+    Writes (user_data, tax_summary) pairs from any iterable (e.g. a generator over
+    a database cursor) to one NDJSON or zip file. Returns how many were written.
+    """
+    with ITRExporter(path, export_format) as exporter:
+        for user_data, tax_summary in returns:
+            exporter.add(generate_govt_json(user_data, tax_summary, compact=True, id_provider=id_provider, clock=clock),
+                         user_data.pan_number)
+        return exporter.count
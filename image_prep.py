@@ -0,0 +1,79 @@
+# image_prep.py
+# Cleans up Form 16 scans before OCR: smaller, grayscale, black & white, straight.
+# Tesseract is both faster and more accurate on a 200-dpi binarized page than
+# on a raw 300-dpi colour scan.
+import numpy as np
+from PIL import Image
+
+TARGET_DPI = 200          # Enough for printed Form 16 text
+DEFAULT_SOURCE_DPI = 300  # Assumed when the file has no DPI info
+MAX_SKEW = 5.0            # Degrees searched either side when deskewing
+DESKEW_WIDTH = 800        # Width of the thumbnail used to measure skew
+
+def downsample(img, target_dpi=TARGET_DPI):
+    """Scales the page down to target_dpi (never up). Returns (image, scale)."""
+    source_dpi = float(img.info.get("dpi", (DEFAULT_SOURCE_DPI,))[0] or DEFAULT_SOURCE_DPI)
+    if source_dpi <= target_dpi:
+        return img, 1.0
+    scale = target_dpi / source_dpi
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.Resampling.LANCZOS), scale
+
+def otsu_threshold(gray):
+    """Otsu's threshold for a grayscale ("L") image"""
+    histogram = np.bincount(np.asarray(gray).ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    levels = np.arange(256)
+    weight_dark = np.cumsum(histogram)
+    weight_light = total - weight_dark
+    mean_dark = np.cumsum(histogram * levels)
+    mean_total = mean_dark[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mean_total * weight_dark / total - mean_dark) ** 2 / (weight_dark * weight_light)
+    return int(np.nanargmax(between))
+
+def binarize(gray):
+    """Black text on a white background"""
+    threshold = otsu_threshold(gray)
+    return gray.point(lambda p: 255 if p > threshold else 0)
+
+def estimate_skew(gray, max_angle=MAX_SKEW):
+    """
+    Angle (degrees, counter-clockwise like PIL) the page is rotated by, using a projection profile:
+    when text lines are horizontal, the row sums of ink are the most "peaky".
+    Works on a thumbnail and on ink pixel coordinates, so no image is rotated.
+    """
+    scale = min(1.0, DESKEW_WIDTH / gray.width)
+    thumb = gray.resize((max(1, round(gray.width * scale)), max(1, round(gray.height * scale))))
+    pixels = np.asarray(thumb)
+    ys, xs = np.nonzero(pixels < otsu_threshold(thumb))
+    if len(ys) < 50:
+        return 0.0
+
+    def score(angle):
+        theta = np.deg2rad(angle)
+        rows = np.round(ys * np.cos(theta) - xs * np.sin(theta)).astype(np.int64)
+        profile = np.bincount(rows - rows.min())
+        return float(np.var(profile))
+
+    # Coarse search, then refine around the best coarse angle
+    coarse = max(np.arange(-max_angle, max_angle + 0.01, 0.5), key=score)
+    fine = max(np.arange(coarse - 0.5, coarse + 0.51, 0.1), key=score)
+    return -float(fine)  # Image rows grow downwards, so flip to PIL's convention
+
+def deskew(gray, max_angle=MAX_SKEW):
+    """Rotates the page so text lines are horizontal"""
+    angle = estimate_skew(gray, max_angle)
+    if abs(angle) < 0.1:
+        return gray
+    return gray.rotate(-angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255)
+
+def preprocess_image(img, target_dpi=TARGET_DPI, to_binary=True, straighten=True):
+    """Full clean-up pipeline: downsample -> grayscale -> deskew -> binarize"""
+    img, _ = downsample(img, target_dpi)
+    gray = img.convert("L")
+    if straighten:
+        gray = deskew(gray)
+    if to_binary:
+        gray = binarize(gray)
+    return gray
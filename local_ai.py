@@ -3,17 +3,162 @@ import pytesseract
 from PIL import Image
 import re
 import os
+import io
+from ocr_cache import OCRCache, get_cache
+from image_prep import preprocess_image
+from field_extractor import extract_fields, best_fields
+from metrics import span, timed, increment
 
 # --- CONFIGURATION ---
 # IMPORTANT: This path must point to where you installed Tesseract.
 # If you didn't change the default settings during installation, this is correct.
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-def ai_extract_data(image_path):
+# Everything that changes the result of ai_extract_data for the same image.
+# It is part of the OCR cache key - bump "extractor" when the parsing logic changes.
+OCR_CONFIG = {"lang": "eng", "tesseract_config": "", "extractor": 2}
+
+# --- REGION-OF-INTEREST MODE ---
+# Instead of reading the whole page, read only:
+#   1. the header band (where Form 16 prints the employee PAN), and
+#   2. the salary-summary block, located with a quick low-resolution image_to_data pass.
+HEADER_BAND = 0.35       # Top share of the page that is OCR'd for the PAN
+LOCATE_SCALE = 0.5       # The locating pass runs on a copy this much smaller
+ROI_PADDING = 1.0        # Extra line-heights kept above / below the salary block
+SALARY_KEYWORDS = ["salary", "income", "gross", "net pay", "total"]
+
+# --- PDF FORM 16 ---
+PDF_DPI = 200            # Render resolution for scanned PDF pages (no text layer)
+
+def find_pan(text):
+    """PAN Number. Regex Rule: 5 Letters, 4 Digits, 1 Letter (e.g., ABCDE1234F)"""
+    pan_match = re.search(r'[A-Z]{5}[0-9]{4}[A-Z]', text)
+    return pan_match.group(0) if pan_match else ""
+
+def find_salary(text):
+    """Gross salary: the best labelled salary amount (see field_extractor.py)"""
+    return best_fields(extract_fields(text)).get("salary_income", 0.0)
+
+def _add_fields(result):
+    """Adds every labelled amount (80C, 80D, TDS, ...) so the wizard can prefill all TaxPayer fields"""
+    candidates = extract_fields(result["text"])
+    result["candidates"] = candidates
+    result["fields"] = best_fields(candidates)
+    result["salary"] = result["fields"].get("salary_income", 0.0)
+    return result
+
+def _ocr(img, timeout):
+    with span("ocr.tesseract"):
+        return pytesseract.image_to_string(img, lang=OCR_CONFIG["lang"], config=OCR_CONFIG["tesseract_config"],
+                                           timeout=timeout)
+
+def _locate_salary_block(img, timeout):
+    """
+    Finds the salary-summary lines with image_to_data on a reduced copy.
+    Returns ((top, bottom) in full-size pixels or None, text of the located words).
+    """
+    small = img.resize((max(1, int(img.width * LOCATE_SCALE)), max(1, int(img.height * LOCATE_SCALE))))
+    with span("ocr.locate"):
+        data = pytesseract.image_to_data(small, lang=OCR_CONFIG["lang"], output_type=pytesseract.Output.DICT,
+                                         timeout=timeout)
+
+    # Group words into lines with their bounding boxes
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        top, bottom = data["top"][i], data["top"][i] + data["height"][i]
+        words, line_top, line_bottom = lines.get(key, ([], top, bottom))
+        lines[key] = (words + [word], min(line_top, top), max(line_bottom, bottom))
+
+    located_text = "\n".join(" ".join(words) for words, _, _ in lines.values())
+    matches = [(top, bottom) for words, top, bottom in lines.values()
+               if any(keyword in " ".join(words).lower() for keyword in SALARY_KEYWORDS)]
+    if not matches:
+        return None, located_text
+
+    top = min(t for t, _ in matches)
+    bottom = max(b for _, b in matches)
+    padding = max(b - t for t, b in matches) * ROI_PADDING
+    return (int((top - padding) / LOCATE_SCALE), int((bottom + padding) / LOCATE_SCALE)), located_text
+
+def ocr_regions(img, timeout=0):
+    """OCRs only the header band and the salary block. Returns the combined text."""
+    header = img.crop((0, 0, img.width, int(img.height * HEADER_BAND)))
+    texts = [_ocr(header, timeout)]
+
+    block, located_text = _locate_salary_block(img, timeout)
+    if block is not None:
+        top, bottom = max(0, block[0]), min(img.height, block[1])
+        texts.append(_ocr(img.crop((0, top, img.width, bottom)), timeout))
+    else:
+        texts.append(located_text)
+    return "\n".join(texts)
+
+def _extract_pdf(pdf_path, timeout, preprocess, mode):
+    """
+    Reads a (multi-page) PDF one page at a time and stops as soon as both the
+    PAN and the gross salary are found. Pages with a text layer are read
+    directly; only scanned pages are rendered and OCR'd. At most one rendered
+    page is in memory at any time.
+    """
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return {"error": "PDF support needs pypdfium2 (pip install pypdfium2)"}
+
+    texts, pan, salary = [], "", 0.0
+    pages_read = ocr_pages = 0
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for page_number in range(len(pdf)):
+            page = pdf[page_number]
+            try:
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                if not text.strip():
+                    # Scanned page: render just this page and OCR it
+                    with span("ocr.pdf_render"):
+                        bitmap = page.render(scale=PDF_DPI / 72)
+                        img = bitmap.to_pil()
+                    img.info["dpi"] = (PDF_DPI, PDF_DPI)
+                    if preprocess:
+                        with span("ocr.preprocess"):
+                            img = preprocess_image(img)
+                    text = ocr_regions(img, timeout) if mode == "roi" else _ocr(img, timeout)
+                    img.close()
+                    bitmap.close()
+                    ocr_pages += 1
+            finally:
+                page.close()
+
+            pages_read += 1
+            texts.append(text)
+            pan = pan or find_pan(text)
+            salary = salary or find_salary(text)
+            if pan and salary:
+                break # Early exit: no need to read the rest of the document
+    finally:
+        pdf.close()
+
+    return _add_fields({"pan": pan, "salary": salary, "text": "\n".join(texts), "error": None,
+                        "pages_read": pages_read, "ocr_pages": ocr_pages})
+
+@timed("ocr.extract")
+def ai_extract_data(image_path, timeout=0, use_cache=True, preprocess=False, mode="full"):
     """
     The 'Brain' of the Offline Engine.
     1. Uses Tesseract (Vision) to read the text.
-    2. Uses Regex (Logic) to find PAN numbers and Salary.
+    2. Uses Regex (Logic) to find PAN numbers, Salary and the other labelled
+       amounts ("fields": best value per TaxPayer field, "candidates": all of them).
+    timeout: seconds before the Tesseract process is killed (0 = no limit).
+    use_cache: return the stored result if this exact image was read before.
+    preprocess: downsample, grayscale, deskew and binarize the scan first (see image_prep.py).
+    mode: "full" reads the whole page, "roi" only the PAN header and salary block
+          (falls back to the whole page if either is missing).
+    PDFs are supported too (see _extract_pdf).
     """
     
     # Default response if things fail
@@ -29,43 +174,55 @@ def ai_extract_data(image_path):
         if not os.path.exists(image_path):
             return {"error": "File not found"}
 
-        img = Image.open(image_path)
+        config = dict(OCR_CONFIG, preprocess=preprocess, mode=mode)
+        if image_path.lower().endswith(".pdf"):
+            # Hashed in chunks: a long PDF is never loaded whole
+            cache_key = OCRCache.make_file_key(image_path, config)
+            cached = get_cache().get(cache_key) if use_cache else None
+            if cached is not None:
+                increment("ocr.cache_hit")
+                return cached
+            result = _extract_pdf(image_path, timeout, preprocess, mode)
+            if use_cache and not result.get("error"):
+                get_cache().put(cache_key, result)
+            return result
+
+        with open(image_path, "rb") as f:
+            image_bytes = f.read()
+
+        # Same scan uploaded again (with the same settings)? Skip Tesseract entirely.
+        cache_key = OCRCache.make_key(image_bytes, config)
+        if use_cache:
+            cached = get_cache().get(cache_key)
+            if cached is not None:
+                increment("ocr.cache_hit")
+                return cached
+
+        img = Image.open(io.BytesIO(image_bytes))
+        if preprocess:
+            with span("ocr.preprocess"):
+                img = preprocess_image(img)
+
         # extracting text from image
-        raw_text = pytesseract.image_to_string(img)
-        result["text"] = raw_text
+        raw_text = ocr_regions(img, timeout) if mode == "roi" else _ocr(img, timeout)
 
         # --- PHASE 2: LOGIC (Pattern Recognition) ---
-        
-        # 1. Find PAN Number
-        # Regex Rule: 5 Letters, 4 Digits, 1 Letter (e.g., ABCDE1234F)
-        pan_match = re.search(r'[A-Z]{5}[0-9]{4}[A-Z]', raw_text)
-        if pan_match:
-            result["pan"] = pan_match.group(0)
-
-        # 2. Find Salary
-        # We look for lines containing "Salary", "Income", "Gross", or "Net"
-        lines = raw_text.split('\n')
-        for line in lines:
-            clean_line = line.lower().replace(',', '') # Remove commas (12,000 -> 12000)
-            
-            # Check for money keywords
-            if any(keyword in clean_line for keyword in ["salary", "income", "gross", "net pay", "total"]):
-                # Find all numbers in that line
-                numbers = re.findall(r'\d+', clean_line)
-                
-                # Check if any number looks like a salary (usually > 50,000)
-                for num in numbers:
-                    val = float(num)
-                    # Simple filter: Ignore years (2024) or small IDs
-                    if val > 50000:
-                        result["salary"] = val
-                        break # Stop after finding the first valid big number
-                
-                if result["salary"] > 0:
-                    break
+        pan, salary = find_pan(raw_text), find_salary(raw_text)
+        if mode == "roi" and not (pan and salary):
+            # The regions missed something (unusual layout): read the whole page
+            raw_text = _ocr(img, timeout)
+            pan, salary = find_pan(raw_text), find_salary(raw_text)
+
+        result["text"] = raw_text
+        result["pan"] = pan
+        result["salary"] = salary
+        _add_fields(result)
 
+        if use_cache:
+            get_cache().put(cache_key, result)
         return result
 
     except Exception as e:
         # If Tesseract is not installed or crashes, return the error safely
-        return {"error": str(e)}
\ No newline at end of file
+        increment("ocr.error")
+        return {"error": str(e)}
@@ -0,0 +1,186 @@
+# metrics.py
+# Lightweight instrumentation: latency histograms per stage + event counters.
+#
+#   with span("pipeline.audit"): ...        # time a block
+#   @timed("brain.query")                    # time a function
+#   increment("ocr.cache_hit")               # count an event
+#
+# Exported as Prometheus text (render_prometheus, served at /metrics by api.py)
+# and, if SAHAJ_METRICS_LOG_INTERVAL is set, as a periodic log line.
+# SAHAJ_METRICS=0 turns everything into no-ops (one flag check per call).
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+ENABLED = os.environ.get("SAHAJ_METRICS", "1") != "0"
+LOG_INTERVAL = float(os.environ.get("SAHAJ_METRICS_LOG_INTERVAL", "0"))  # Seconds, 0 = no log line
+# Histogram bucket upper bounds in seconds (Prometheus "le")
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Per-bucket counts (not cumulative) plus sum / count / max for one stage"""
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last one is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimated quantile (upper bound of the bucket it falls in)"""
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS + (self.max,), self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(bound, self.max)
+        return self.max
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_state = {"enabled": ENABLED}
+
+def set_enabled(enabled):
+    """Turns collection on / off at runtime"""
+    _state["enabled"] = bool(enabled)
+
+def observe(stage, seconds):
+    """Records one duration for a stage"""
+    if not _state["enabled"]:
+        return
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+def increment(event, amount=1):
+    """Adds to an event counter"""
+    if not _state["enabled"]:
+        return
+    with _lock:
+        _counters[event] = _counters.get(event, 0) + amount
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.stage, time.perf_counter() - self.start)
+        if exc_type is not None:
+            increment(f"{self.stage}.error")
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(stage):
+    """Context manager timing a block as `stage` (errors are counted as `stage`.error)"""
+    return _Span(stage) if _state["enabled"] else _NO_SPAN
+
+def timed(stage):
+    """Decorator version of span()"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return fn(*args, **kwargs)
+            with _Span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# --- EXPORT ---
+def snapshot():
+    """{"stages": {stage: {count, mean_ms, p50_ms, p95_ms, max_ms}}, "counters": {event: n}}"""
+    with _lock:
+        stages = {
+            stage: {
+                "count": h.count,
+                "mean_ms": round(1000 * h.total / h.count, 3) if h.count else 0.0,
+                "p50_ms": round(1000 * h.quantile(0.5), 3),
+                "p95_ms": round(1000 * h.quantile(0.95), 3),
+                "max_ms": round(1000 * h.max, 3),
+            }
+            for stage, h in sorted(_histograms.items())
+        }
+        return {"stages": stages, "counters": dict(sorted(_counters.items()))}
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    lines = ["# HELP sahaj_stage_seconds Latency of each processing stage.",
+             "# TYPE sahaj_stage_seconds histogram"]
+    with _lock:
+        for stage, h in sorted(_histograms.items()):
+            label = _label(stage)
+            cumulative = 0
+            for bound, n in zip(BUCKETS, h.counts):
+                cumulative += n
+                lines.append(f'sahaj_stage_seconds_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'sahaj_stage_seconds_bucket{{stage="{label}",le="+Inf"}} {h.count}')
+            lines.append(f'sahaj_stage_seconds_sum{{stage="{label}"}} {h.total}')
+            lines.append(f'sahaj_stage_seconds_count{{stage="{label}"}} {h.count}')
+        lines += ["# HELP sahaj_events_total Counted events (cache hits, errors, fallbacks...).",
+                  "# TYPE sahaj_events_total counter"]
+        for event, n in sorted(_counters.items()):
+            lines.append(f'sahaj_events_total{{event="{_label(event)}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+def log_line():
+    """One-line summary: stage=count/p50/p95 ms, then the counters"""
+    data = snapshot()
+    parts = [f"{stage}={s['count']}x p50={s['p50_ms']}ms p95={s['p95_ms']}ms" for stage, s in data["stages"].items()]
+    parts += [f"{event}={n}" for event, n in data["counters"].items()]
+    return "metrics: " + ("; ".join(parts) or "no data")
+
+def reset():
+    """Clears all collected data"""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+# --- PERIODIC LOG LINE ---
+_reporter = None
+
+def start_log_reporter(interval=None):
+    """Prints log_line() every `interval` seconds from a daemon thread (once per process)"""
+    global _reporter
+    interval = LOG_INTERVAL if interval is None else interval
+    if interval <= 0 or _reporter is not None:
+        return
+    def run():
+        while True:
+            time.sleep(interval)
+            print(log_line(), flush=True)
+    _reporter = threading.Thread(target=run, name="metrics-log", daemon=True)
+    _reporter.start()
+
+if ENABLED and LOG_INTERVAL > 0:
+    start_log_reporter()
@@ -0,0 +1,116 @@
+# ocr_cache.py
+# Cache for Form 16 OCR results, so re-uploading the same scan skips Tesseract.
+# Two tiers: a small in-memory LRU in front of a SQLite file on disk.
+# Keys are SHA-256(image bytes + OCR config), so a changed setting never returns a stale result.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_FILE = os.environ.get("SAHAJ_OCR_CACHE", "ocr_cache.sqlite3")
+MEMORY_ITEMS = 256      # Results kept in RAM
+DISK_ITEMS = 20000      # Results kept on disk; least recently used are evicted beyond this
+
+class OCRCache:
+    """In-memory LRU over a SQLite store, with hit / miss counters"""
+
+    def __init__(self, path=CACHE_FILE, memory_items=MEMORY_ITEMS, disk_items=DISK_ITEMS):
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")  # Lets bulk OCR worker processes share the file
+        self._db.execute("CREATE TABLE IF NOT EXISTS ocr_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ocr_cache_last_used ON ocr_cache (last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(image_bytes, config):
+        """SHA-256 of the image bytes plus the OCR settings"""
+        digest = hashlib.sha256(image_bytes)
+        digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_file_key(path, config, chunk_size=1 << 20):
+        """Same as make_key, but hashes the file in chunks (for big PDFs)"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Returns a copy of the cached result, or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return dict(self._memory[key])
+
+            row = self._db.execute("SELECT value FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            self._db.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            value = json.loads(row[0])
+            self._remember(key, value)
+            self.counters["disk_hits"] += 1
+            return dict(value)
+
+    def put(self, key, value):
+        """Stores a result in both tiers, evicting the least recently used entries on disk"""
+        with self._lock:
+            self._remember(key, dict(value))
+            self._db.execute("INSERT OR REPLACE INTO ocr_cache (key, value, last_used) VALUES (?, ?, ?)",
+                             (key, json.dumps(value), time.time()))
+            extra = self._db.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0] - self.disk_items
+            if extra > 0:
+                self._db.execute("DELETE FROM ocr_cache WHERE key IN "
+                                 "(SELECT key FROM ocr_cache ORDER BY last_used LIMIT ?)", (extra,))
+                self.counters["evictions"] += extra
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM ocr_cache")
+            self._db.commit()
+
+    def stats(self):
+        """Hit / miss counters plus current sizes"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_items"] = len(self._memory)
+            stats["disk_items"] = self._db.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+# One cache per process (each bulk OCR worker opens its own connection)
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Returns the process-wide cache, opening it on first use"""
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = OCRCache()
+            _cache_pid = os.getpid()
+        return _cache
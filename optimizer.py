@@ -0,0 +1,107 @@
+# optimizer.py
+# Recommends how much more to invest under 80C / 80D, and in which regime to file.
+#
+# New Regime tax does not depend on deductions. Old Regime tax is a
+# non-decreasing, piecewise-linear function of taxable income, and 80C and
+# 80D both reduce taxable income rupee for rupee. So the best plan is found
+# from the slab breakpoints directly (no scanning of investment amounts):
+#   * Old Regime tax is lowest with the most extra deduction the caps and budget allow;
+#   * if that lands at zero tax, investing beyond the zero-tax point saves nothing,
+#     so we stop exactly there;
+#   * the breakeven deduction (Old = New) is the inverse of the slab function.
+# Everything is vectorized, so a whole employee roster is one call.
+import numpy as np
+from models import TaxPayer
+from calculator import _as_columns, calculate_new_regime_batch, calculate_old_regime_batch
+from tax_schedules import get_schedule
+
+SENIOR_CITIZEN_AGE = 60
+
+def optimize_batch(salary, interest=None, section_80c=None, section_80d=None, age=None, budget=None,
+                   assessment_year=None):
+    """
+    Tax-minimizing plan for many taxpayers at once (arrays / lists / Series).
+    budget is the extra money available for investments (None = only the caps limit it).
+    Returns a dict of arrays:
+      regime, tax, invest_80c, invest_80d       the plan (extra amounts on top of what is claimed)
+      tax_new, tax_old, tax_old_optimized       taxes for comparison
+      savings                                   vs. the better regime for the current claims
+      breakeven_deduction                       extra deduction at which Old costs the same as New
+                                                (0 if Old is already cheaper, inf if no deduction is enough)
+      breakeven_within_caps                     True if that deduction fits within the 80C / 80D caps
+    """
+    schedule = get_schedule("old", assessment_year)
+    salary, interest, section_80c, section_80d, age, budget = _as_columns(
+        salary, interest, section_80c, section_80d, age, np.inf if budget is None else budget)
+
+    tax_new = calculate_new_regime_batch(salary, interest, assessment_year)
+    tax_old = calculate_old_regime_batch(salary, interest, section_80c, section_80d, assessment_year)
+
+    # Room left under each cap, then the budget
+    cap_80d = np.where(age >= SENIOR_CITIZEN_AGE, schedule.section_80d_senior_cap, schedule.section_80d_cap)
+    room_80c = np.maximum(schedule.section_80c_cap - section_80c, 0.0)
+    room_80d = np.maximum(cap_80d - section_80d, 0.0)
+    max_extra = np.minimum(room_80c + room_80d, np.maximum(budget, 0.0))
+
+    # Best Old Regime plan: all the room, or just enough to reach the zero-tax point
+    taxable = (salary + interest) - (np.minimum(section_80c, schedule.section_80c_cap) + section_80d + schedule.standard_deduction)
+    lowest_tax = schedule.tax_on_array(taxable - max_extra)
+    to_zero_tax = np.clip(taxable - schedule.zero_tax_limit(), 0.0, max_extra)
+    extra = np.where(lowest_tax == 0, to_zero_tax, max_extra)
+
+    # Any split gives the same tax; fill 80C first, then 80D
+    invest_80c = np.minimum(extra, room_80c)
+    invest_80d = extra - invest_80c
+    tax_old_optimized = calculate_old_regime_batch(salary, interest, section_80c + invest_80c, section_80d + invest_80d,
+                                                   assessment_year)
+
+    # Same tie-break as the app: New only if it is strictly cheaper
+    use_new = tax_new < tax_old_optimized
+    regime = np.where(use_new, "New", "Old")
+    tax = np.where(use_new, tax_new, tax_old_optimized)
+    invest_80c = np.where(use_new, 0.0, invest_80c)
+    invest_80d = np.where(use_new, 0.0, invest_80d)
+
+    breakeven = np.maximum(taxable - schedule.max_income_for_tax(tax_new), 0.0)
+    return {
+        "regime": regime,
+        "tax": tax,
+        "invest_80c": invest_80c,
+        "invest_80d": invest_80d,
+        "tax_new": tax_new,
+        "tax_old": tax_old,
+        "tax_old_optimized": tax_old_optimized,
+        "savings": np.minimum(tax_new, tax_old) - tax,
+        "breakeven_deduction": breakeven,
+        "breakeven_within_caps": breakeven <= room_80c + room_80d,
+    }
+
+def optimize_deductions(user: TaxPayer, budget=None, assessment_year=None):
+    """Tax-minimizing plan for one taxpayer (see optimize_batch for the keys)"""
+    result = optimize_batch([user.salary_income], [user.interest_income], [user.section_80c_deductions],
+                            [user.section_80d_deductions], [user.age],
+                            None if budget is None else [budget], assessment_year)
+    plan = {key: values[0].item() for key, values in result.items()}
+    plan["regime"] = str(result["regime"][0])
+    return plan
+
+def optimize_dataframe(df, budget=None, assessment_year=None):
+    """
+    DataFrame wrapper around optimize_batch (e.g. an employee roster).
+    Expects TaxPayer column names; budget can be a scalar or a column name.
+    Returns a new DataFrame with the plan columns added.
+    """
+    if isinstance(budget, str):
+        budget = df[budget].to_numpy()
+    result = optimize_batch(
+        df["salary_income"].to_numpy(),
+        df["interest_income"].to_numpy() if "interest_income" in df else None,
+        df["section_80c_deductions"].to_numpy() if "section_80c_deductions" in df else None,
+        df["section_80d_deductions"].to_numpy() if "section_80d_deductions" in df else None,
+        df["age"].to_numpy() if "age" in df else None,
+        budget, assessment_year,
+    )
+    out = df.copy()
+    for column, values in result.items():
+        out[column] = values
+    return out
@@ -0,0 +1,187 @@
+# peer_stats.py
+# Peer statistics for the auditor's anomaly check.
+# Returns are grouped by income band x age band. For every group we keep the
+# count, sum and sum of squares of a few ratios (see METRICS) in the
+# "peer_stats" collection. Saving a record only $inc's its group's document,
+# so the statistics are always current and are never recomputed by scanning
+# the records collection. Scoring a return is a dict lookup plus a z-score.
+# The database stack is only imported by the functions that talk to MongoDB,
+# so scoring against a PeerStats snapshot needs nothing but NumPy.
+import math
+import threading
+import time
+import numpy as np
+
+PEER_STATS_COLLECTION = "peer_stats"
+INCOME_BANDS = [0, 500000, 1000000, 1500000, 2500000, 5000000]  # Same bands as the admin dashboard
+AGE_BANDS = [0, 30, 45, 60, 80]
+MIN_PEERS = 30          # Groups with fewer returns are not used for scoring
+MIN_STD = 0.02          # Floor for the standard deviation, so near-constant groups don't explode
+REFRESH_INTERVAL = 300  # Seconds between reloads of the (small) stats collection
+
+# Metric name -> ratio computed from a record (see pipeline.build_record)
+METRICS = {
+    "deduction_ratio": lambda income, c80, d80: (c80 + d80) / income,
+    "health_ratio": lambda income, c80, d80: d80 / income,
+}
+
+def _band(value, bands):
+    """Index of the band a value falls into (values below the first boundary go to band 0)"""
+    return max(0, int(np.searchsorted(bands, value, side="right")) - 1)
+
+def peer_group(income, age):
+    """Group key stored in the collection, e.g. "i2_a1" """
+    return f"i{_band(income, INCOME_BANDS)}_a{_band(age, AGE_BANDS)}"
+
+def record_metrics(record):
+    """(group, {metric: value}) for a saved tax record, or None if it can't be grouped"""
+    income = record.get("income") or 0
+    if income <= 0 or record.get("age") is None:
+        return None
+    c80, d80 = record.get("section_80c", 0), record.get("section_80d", 0)
+    return peer_group(income, record["age"]), {name: fn(income, c80, d80) for name, fn in METRICS.items()}
+
+def _increments(values):
+    inc = {"n": 1}
+    for name, value in values.items():
+        inc[f"{name}.sum"] = value
+        inc[f"{name}.sumsq"] = value * value
+    return inc
+
+def record_peer_stats(records, collection=None):
+    """Adds newly saved records to the peer statistics (one upsert per group). Returns records counted."""
+    totals = {}
+    for record in records:
+        grouped = record_metrics(record)
+        if grouped is None:
+            continue
+        group, values = grouped
+        inc = totals.setdefault(group, {})
+        for key, value in _increments(values).items():
+            inc[key] = inc.get(key, 0) + value
+    if not totals:
+        return 0
+
+    import database
+    from pymongo.errors import PyMongoError
+    collection = collection if collection is not None else database.get_connection()
+    if collection is None:
+        return 0
+    counted = 0
+    try:
+        stats_collection = collection.database[PEER_STATS_COLLECTION]
+        # A handful of round trips at most: there are only len(INCOME_BANDS) x len(AGE_BANDS) groups
+        for group, inc in totals.items():
+            stats_collection.update_one({"_id": group}, {"$inc": inc}, upsert=True)
+            counted += inc["n"]
+    except Exception as e:
+        # Runs after the records were saved, so a statistics failure must never fail the save
+        if isinstance(e, PyMongoError):
+            database.report_failure()
+        print(f"Peer Stats Warning: {e}")
+    return counted
+
+def rebuild_peer_stats(collection=None):
+    """One-off backfill from the whole records collection (e.g. after adding a metric)"""
+    import database
+    collection = collection if collection is not None else database.get_connection()
+    if collection is None:
+        return 0
+    collection.database[PEER_STATS_COLLECTION].delete_many({})
+    cursor = collection.find({}, {"income": 1, "age": 1, "section_80c": 1, "section_80d": 1}).batch_size(5000)
+    batch, counted = [], 0
+    for record in cursor:
+        batch.append(record)
+        if len(batch) == 5000:
+            counted += record_peer_stats(batch, collection)
+            batch = []
+    return counted + record_peer_stats(batch, collection)
+
+class PeerStats:
+    """In-memory copy of the peer_stats collection: group -> {metric: (mean, std)}"""
+
+    def __init__(self, documents=()):
+        self.groups = {}
+        for doc in documents:
+            n = doc.get("n", 0)
+            if n < MIN_PEERS:
+                continue
+            moments = {}
+            for name in METRICS:
+                m = doc.get(name, {})
+                mean = m.get("sum", 0.0) / n
+                variance = max(0.0, m.get("sumsq", 0.0) / n - mean * mean)
+                moments[name] = (mean, max(math.sqrt(variance), MIN_STD))
+            self.groups[doc["_id"]] = moments
+
+    def z_scores(self, income, age, section_80c, section_80d):
+        """{metric: z} against the return's peer group ({} if there are too few peers)"""
+        if income <= 0:
+            return {}
+        moments = self.groups.get(peer_group(income, age))
+        if moments is None:
+            return {}
+        return {name: (fn(income, section_80c, section_80d) - moments[name][0]) / moments[name][1]
+                for name, fn in METRICS.items()}
+
+    def z_scores_frame(self, df):
+        """Largest z per row for a DataFrame of returns (0 where there are too few peers)"""
+        if not self.groups:
+            return np.zeros(len(df))
+        income = df["salary_income"].to_numpy(dtype=float)
+        age = df["age"].to_numpy(dtype=float)
+        c80 = df["section_80c_deductions"].to_numpy(dtype=float)
+        d80 = df["section_80d_deductions"].to_numpy(dtype=float)
+        groups = [f"i{i}_a{a}" for i, a in zip(np.maximum(np.searchsorted(INCOME_BANDS, income, side="right") - 1, 0),
+                                              np.maximum(np.searchsorted(AGE_BANDS, age, side="right") - 1, 0))]
+        safe_income = np.where(income > 0, income, 1.0)
+        best = np.zeros(len(df))
+        for name, fn in METRICS.items():
+            mean = np.array([self.groups[g][name][0] if g in self.groups else np.nan for g in groups])
+            std = np.array([self.groups[g][name][1] if g in self.groups else np.nan for g in groups])
+            z = (fn(safe_income, c80, d80) - mean) / std
+            best = np.fmax(best, np.where(income > 0, z, np.nan))
+        return best
+
+def load_peer_stats():
+    """Reads the stats collection now (blocking). Returns a PeerStats, or None if MongoDB is unavailable."""
+    import database
+    from pymongo.errors import PyMongoError
+    collection = database.get_connection()
+    if collection is None:
+        return None
+    try:
+        return PeerStats(collection.database[PEER_STATS_COLLECTION].find())
+    except PyMongoError:
+        database.report_failure()
+        return None
+
+# --- SHARED SNAPSHOT (reloaded in the background every REFRESH_INTERVAL seconds) ---
+# Audits never wait on MongoDB: until the first load finishes (or while MongoDB
+# is down) they score against the previous snapshot, which starts out empty
+# (= no anomaly scoring).
+_snapshot = {"stats": PeerStats(), "loaded_at": None, "loading": False}
+_snapshot_lock = threading.Lock()
+
+def _reload():
+    stats = load_peer_stats()
+    with _snapshot_lock:
+        _snapshot["loading"] = False
+        if stats is not None and _snapshot["loaded_at"] != math.inf:  # Not pinned by set_peer_stats meanwhile
+            _snapshot["stats"] = stats
+
+def get_peer_stats():
+    """Current peer statistics snapshot. Never blocks; a stale snapshot starts a background reload."""
+    with _snapshot_lock:
+        loaded_at = _snapshot["loaded_at"]
+        if (loaded_at is None or time.monotonic() - loaded_at >= REFRESH_INTERVAL) and not _snapshot["loading"]:
+            _snapshot["loaded_at"] = time.monotonic()  # Also after a failure, so we don't retry on every return
+            _snapshot["loading"] = True
+            threading.Thread(target=_reload, name="peer-stats", daemon=True).start()
+        return _snapshot["stats"]
+
+def set_peer_stats(stats):
+    """Pins the snapshot (tests, or no database at all)"""
+    with _snapshot_lock:
+        _snapshot["stats"] = stats
+        _snapshot["loaded_at"] = math.inf
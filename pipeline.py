@@ -0,0 +1,78 @@
+# pipeline.py
+# End-to-end processing of one tax return:
+# TaxPayer -> both regime calculators -> summary -> compliance audit -> ITR JSON.
+# Shared by the Streamlit app and the batch CLI, so both give identical results.
+from models import TaxPayer
+from calculator import calculate_new_regime, calculate_old_regime
+from auditor import audit_tax_return
+from datetime import datetime
+from filing import generate_govt_json, random_submission_id
+from tax_schedules import DEFAULT_ASSESSMENT_YEAR, get_schedule
+from metrics import span
+
+# Returns with this risk score or more are not filed or saved
+BLOCKING_RISK_SCORE = 100
+
+def compute_taxes(user: TaxPayer, assessment_year=None):
+    """Both regimes plus the recommendation: (tax_new, tax_old, best_regime, final_tax)"""
+    tax_new = calculate_new_regime(user, assessment_year)
+    tax_old = calculate_old_regime(user, assessment_year)
+    best_regime = "New" if tax_new < tax_old else "Old"
+    final_tax = min(tax_new, tax_old)
+    return tax_new, tax_old, best_regime, final_tax
+
+def build_summary(user: TaxPayer, best_regime, final_tax, assessment_year=None):
+    """
+    The tax summary used by the auditor and the ITR JSON.
+    Taxable income and deductions come from the same schedule the calculators use.
+    """
+    schedule = get_schedule(best_regime, assessment_year)
+    gross_income = user.salary_income + user.interest_income
+    taxable_income = schedule.taxable_income(gross_income, user.section_80c_deductions, user.section_80d_deductions)
+    # Chapter VI-A deductions (80C up to its cap + 80D); the standard deduction is part of the salary head
+    total_deductions = 0.0
+    if schedule.allows_deductions:
+        total_deductions = min(user.section_80c_deductions, schedule.section_80c_cap) + user.section_80d_deductions
+    return {
+        "selected_regime": best_regime, "better_regime": best_regime,
+        "taxable_income": max(0.0, taxable_income),
+        "total_deductions": total_deductions,
+        "final_tax": final_tax, "tax_payable": final_tax/1.04, "cess": final_tax - (final_tax/1.04), "audit_score": 0,
+        "assessment_year": assessment_year or DEFAULT_ASSESSMENT_YEAR,
+    }
+
+def build_record(user: TaxPayer, best_regime, final_tax):
+    """The document saved to MongoDB for the admin Tax Records tab"""
+    return {"name": user.name, "pan": user.pan_number, "status": "Generated", "income": user.salary_income,
+            "tax": final_tax, "regime": best_regime,
+            # Used for the auditor's peer statistics (see peer_stats.py)
+            "age": user.age, "section_80c": user.section_80c_deductions, "section_80d": user.section_80d_deductions}
+
+def process_return(user: TaxPayer, assessment_year=None, with_json=True, compact=False, id_provider=random_submission_id,
+                   clock=datetime.now, peer_stats=None):
+    """
+    Runs the whole pipeline for one return. Nothing is saved here (see build_record).
+    Returns a dict with tax_new, tax_old, best_regime, final_tax, summary, audit,
+    can_file and itr_json (None if the return is blocked or with_json=False;
+    one validated line if compact=True, see filing.generate_govt_json).
+    id_provider / clock set the ITR submission ID and timestamp (see filing.py).
+    peer_stats: PeerStats snapshot for the audit's anomaly rule (None = not run, see auditor.py).
+    """
+    with span("pipeline.calculate"):
+        tax_new, tax_old, best_regime, final_tax = compute_taxes(user, assessment_year)
+        summary = build_summary(user, best_regime, final_tax, assessment_year)
+    with span("pipeline.audit"):
+        audit_report = audit_tax_return(user, summary, peer_stats)
+    can_file = audit_report["risk_score"] < BLOCKING_RISK_SCORE
+    with span("pipeline.itr_json"):
+        itr_json = generate_govt_json(user, summary, compact=compact, id_provider=id_provider, clock=clock) if (can_file and with_json) else None
+    return {
+        "tax_new": tax_new,
+        "tax_old": tax_old,
+        "best_regime": best_regime,
+        "final_tax": final_tax,
+        "summary": summary,
+        "audit": audit_report,
+        "can_file": can_file,
+        "itr_json": itr_json,
+    }
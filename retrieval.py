@@ -0,0 +1,64 @@
+# retrieval.py
+# Pluggable search backends for the AI Sahayak knowledge base.
+# All of them take the TF-IDF question matrix from tax_brain and return the
+# top-k (index, score) pairs for a query vector. Scores are always the exact
+# cosine similarity, so the confidence threshold means the same thing everywhere.
+import numpy as np
+
+def _top_k(indices, scores, k):
+    """Best k (index, score) pairs, highest score first (ties -> lower index first)"""
+    if len(scores) > k:
+        # Keep everything tied with the k-th best score so ties are broken the same way by every backend
+        kth_score = -np.partition(-scores, k - 1)[k - 1]
+        keep = scores >= kth_score
+        indices, scores = indices[keep], scores[keep]
+    order = np.lexsort((indices, -scores))[:k]
+    return [(int(indices[i]), float(scores[i])) for i in order]
+
+class BruteForceRetriever:
+    """Scores every question (the original behaviour)"""
+    name = "brute"
+
+    def fit(self, question_matrix):
+        self.question_matrix = question_matrix
+        return self
+
+    def extend(self, question_matrix, new_rows):
+        return self.fit(question_matrix)
+
+    def search(self, query_vector, k=1):
+        scores = (self.question_matrix @ query_vector.T).toarray().ravel()
+        return _top_k(np.arange(len(scores)), scores, k)
+
+class InvertedIndexRetriever:
+    """
+    Term -> questions postings lists. Only questions that share at least one
+    word with the query are scored; every other question has cosine 0 anyway,
+    so the results are exact.
+    """
+    name = "inverted"
+
+    def fit(self, question_matrix):
+        # Row t of the postings matrix lists every question containing term t
+        self.postings = question_matrix.T.tocsr()
+        return self
+
+    def extend(self, question_matrix, new_rows):
+        return self.fit(question_matrix)
+
+    def search(self, query_vector, k=1):
+        # Sparse (1 x terms) @ (terms x questions) only walks the postings of the query's terms
+        scores = (query_vector @ self.postings).tocsr()
+        scores.eliminate_zeros()
+        return _top_k(scores.indices, scores.data, k)
+
+RETRIEVERS = {
+    "brute": BruteForceRetriever,
+    "inverted": InvertedIndexRetriever,
+}
+
+def make_retriever(name="inverted", **options):
+    """Creates a retrieval backend by name ("brute" or "inverted")"""
+    if name not in RETRIEVERS:
+        raise ValueError(f"Unknown retriever '{name}'. Choose from: {', '.join(RETRIEVERS)}")
+    return RETRIEVERS[name](**options)
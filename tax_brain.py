@@ -1,9 +1,27 @@
 # tax_brain.py
 import json
+import os
+import hashlib
+import threading
+import joblib
+from itertools import islice
+from scipy.sparse import vstack
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from retrieval import make_retriever
+from metrics import span, timed, increment
 import numpy as np
 
+INDEX_FILE = "tax_brain_index.joblib"
+# Search backend: "brute" (score everything) or "inverted" (postings lists, exact and fastest)
+RETRIEVER = os.environ.get("SAHAJ_RETRIEVER", "inverted")
+# If the best match scores below this, the AI says it doesn't know
+CONFIDENCE_THRESHOLD = 0.2
+FALLBACK_ANSWER = "I am not sure about that. I only know about Indian Tax Rules. Can you ask differently?"
+# Queries vectorized together in answer_batch (bounds memory on huge logs)
+BATCH_CHUNK_SIZE = 4096
+# Refit from scratch once this share of the index was added incrementally (IDF weights drift)
+REFIT_RATIO = 0.25
+
 # --- 1. THE KNOWLEDGE BASE (You can add more rules here) ---
 # This is where you "Train" your AI.
 knowledge_base = [
@@ -37,39 +55,189 @@ knowledge_base = [
     }
 ]
 
+# --- 2. THE INDEX (Fitted once, reused for every question) ---
+def _chain_fingerprint(fingerprint, entries):
+    """Extends a hash chain over the questions, so a saved index is never used with a different knowledge base"""
+    for item in entries:
+        fingerprint = hashlib.sha256((fingerprint + "\0" + item["question"]).encode("utf-8")).hexdigest()
+    return fingerprint
+
+class KnowledgeIndex:
+    """
+    TF-IDF vectorizer + question matrix for the knowledge base.
+    Fitting happens once; answering a question only calls transform().
+    """
+
+    def __init__(self, retriever=None):
+        self.vectorizer = None
+        self.question_matrix = None
+        self.retriever = retriever or make_retriever(RETRIEVER)
+        self.size = 0          # How many knowledge_base entries are indexed
+        self.fitted_size = 0   # How many of those were part of the last full fit
+        self.fingerprint = ""
+
+    @timed("brain.fit")
+    def fit(self, entries):
+        """Full (re)fit on the given entries"""
+        self.vectorizer = TfidfVectorizer()
+        self.question_matrix = self.vectorizer.fit_transform([item["question"] for item in entries])
+        self.retriever.fit(self.question_matrix)
+        self.size = self.fitted_size = len(entries)
+        self.fingerprint = _chain_fingerprint("", entries)
+        return self
+
+    def update(self, entries):
+        """
+        Brings the index in line with `entries` (normally the whole knowledge_base).
+        New entries at the end are transformed with the existing vocabulary and stacked
+        under the matrix. A full refit only happens if they bring new words, if too much
+        of the index was added this way, or if entries were removed.
+        """
+        if self.vectorizer is None or len(entries) < self.size:
+            return self.fit(entries)
+        if len(entries) == self.size:
+            return self
+
+        new_entries = entries[self.size:]
+        questions = [item["question"] for item in new_entries]
+        analyzer = self.vectorizer.build_analyzer()
+        vocabulary = self.vectorizer.vocabulary_
+        has_new_words = any(term not in vocabulary for q in questions for term in analyzer(q))
+        too_stale = (len(entries) - self.fitted_size) > REFIT_RATIO * len(entries)
+        if has_new_words or too_stale:
+            return self.fit(entries)
+
+        new_rows = self.vectorizer.transform(questions)
+        self.question_matrix = vstack([self.question_matrix, new_rows], format="csr")
+        self.retriever.extend(self.question_matrix, new_rows)
+        self.size = len(entries)
+        self.fingerprint = _chain_fingerprint(self.fingerprint, new_entries)
+        return self
+
+    def set_retriever(self, retriever):
+        """Swaps the search backend (rebuilt from the current matrix)"""
+        self.retriever = retriever
+        if self.question_matrix is not None:
+            retriever.fit(self.question_matrix)
+        return self
+
+    def search(self, user_query, k=1):
+        """Top-k (index, cosine score) pairs for one question, best first"""
+        with span("brain.vectorize"):
+            user_vector = self.vectorizer.transform([user_query])
+        # TF-IDF rows are L2-normalised, so the dot product is the cosine similarity
+        with span("brain.search"):
+            return self.retriever.search(user_vector, k)
+
+    def query(self, user_query):
+        """Returns (best_match_index, best_score) for one question"""
+        matches = self.search(user_query, k=1)
+        return matches[0] if matches else (None, 0.0)
+
+    def save(self, path=INDEX_FILE):
+        """Stores the fitted index on disk"""
+        joblib.dump(self.__dict__, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        """Loads an index written by save()"""
+        index = cls()
+        index.__dict__.update(joblib.load(path))
+        return index
+
+# Process-wide index (shared by every Streamlit session)
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """Returns the fitted index, loading it from disk or fitting it on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            with span("brain.load_index"):
+                _index = load_index() or KnowledgeIndex()
+            if _index.retriever.name != RETRIEVER:
+                _index.set_retriever(make_retriever(RETRIEVER))
+        return _index.update(knowledge_base)
+
+def load_index(path=INDEX_FILE):
+    """Loads a saved index if it exists and was built from the current knowledge base"""
+    if not os.path.exists(path):
+        return None
+    try:
+        index = KnowledgeIndex.load(path)
+    except Exception:
+        return None
+    if index.size > len(knowledge_base) or index.fingerprint != _chain_fingerprint("", knowledge_base[:index.size]):
+        return None
+    return index
+
+def save_index(path=INDEX_FILE):
+    """Writes the current index to disk so the next process can skip fitting"""
+    get_index().save(path)
+
+def add_knowledge(question, answer):
+    """Teaches the AI a new Q&A pair (the index is updated incrementally)"""
+    knowledge_base.append({"question": question, "answer": answer})
+    get_index()
+
+def search_knowledge(user_query, k=3):
+    """Top-k knowledge base matches above the confidence threshold, best first"""
+    return [
+        {"question": knowledge_base[i]["question"], "answer": knowledge_base[i]["answer"], "score": score}
+        for i, score in get_index().search(user_query, k)
+        if score >= CONFIDENCE_THRESHOLD
+    ]
+
+@timed("brain.query")
 def get_custom_response(user_query):
     """
     My Custom AI Engine:
-    1. Vectorizes the user's query.
+    1. Vectorizes the user's query (with the already-fitted index).
     2. Compares it against the Knowledge Base using Cosine Similarity.
     3. Returns the best match.
     """
     try:
-        # Prepare data
-        questions = [item["question"] for item in knowledge_base]
-        
-        # Add user query to the list temporarily to compare it
-        all_text = questions + [user_query]
-
         # --- THE AI MAGIC (Vectorization) ---
-        vectorizer = TfidfVectorizer()
-        tfidf_matrix = vectorizer.fit_transform(all_text)
-
-        # Calculate Similarity (Last item is user query, compare to all others)
-        user_vector = tfidf_matrix[-1]
-        question_vectors = tfidf_matrix[:-1]
-
-        similarity_scores = cosine_similarity(user_vector, question_vectors)
-        
-        # Find the highest score
-        best_match_index = np.argmax(similarity_scores)
-        best_score = similarity_scores[0][best_match_index]
+        best_match_index, best_score = get_index().query(user_query)
 
         # Threshold: If similarity is too low (< 0.2), the AI is confused.
-        if best_score < 0.2:
-            return "I am not sure about that. I only know about Indian Tax Rules. Can you ask differently?"
+        if best_score < CONFIDENCE_THRESHOLD:
+            increment("brain.fallback")
+            return FALLBACK_ANSWER
         
         return knowledge_base[best_match_index]["answer"]
 
     except Exception as e:
-        return f"Error in AI Engine: {str(e)}"
\ No newline at end of file
+        return f"Error in AI Engine: {str(e)}"
+
+def answer_batch(queries, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    Answers many questions at once (e.g. replaying a support log).
+    `queries` can be any iterable, including a file object; it is read in chunks,
+    and each chunk is scored with one sparse matrix product.
+    Yields one dict per query, in order: query, index (best matching question),
+    score, matched (score >= threshold) and answer.
+    """
+    index = get_index()
+    question_matrix_t = index.question_matrix.T.tocsr()
+    queries = iter(queries)
+    while True:
+        chunk = [q.rstrip("\n") for q in islice(queries, chunk_size)]
+        if not chunk:
+            break
+        # (chunk x terms) @ (terms x questions) -> cosine scores for the whole chunk
+        scores = (index.vectorizer.transform(chunk) @ question_matrix_t).tocsr()
+        scores.sort_indices()  # argmax then breaks ties on the lowest question index, like search()
+        best_indices = np.asarray(scores.argmax(axis=1)).ravel()
+        best_scores = np.asarray(scores.max(axis=1).todense()).ravel()
+
+        for query, best_index, best_score in zip(chunk, best_indices, best_scores):
+            matched = bool(best_score >= CONFIDENCE_THRESHOLD)
+            yield {
+                "query": query,
+                "index": int(best_index),
+                "score": float(best_score),
+                "matched": matched,
+                "answer": knowledge_base[best_index]["answer"] if matched else FALLBACK_ANSWER,
+            }
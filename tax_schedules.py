@@ -0,0 +1,188 @@
+# tax_schedules.py
+# Slab tables for every Assessment Year we support.
+# To add a new year, add an entry to SLAB_TABLES - the calculators and the
+# filing generator pick it up automatically.
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import numpy as np
+
+DEFAULT_ASSESSMENT_YEAR = "2025-26"
+
+# --- 1. THE SLAB TABLES ---
+# Each slab is (upper_limit, rate). The last slab has no upper limit (None).
+# rebate_limit: Rebate u/s 87A -> no tax at all if taxable income <= this.
+# section_80d_*_cap: 80D limits used by the deduction optimizer (optimizer.py).
+SLAB_TABLES = {
+    "2025-26": {  # FY 2024-25
+        "new": {
+            "standard_deduction": 75000,
+            "rebate_limit": 700000,
+            "allows_deductions": False,  # No 80C / 80D in New Regime
+            "section_80c_cap": 0,
+            "section_80d_cap": 0,
+            "section_80d_senior_cap": 0,
+            "slabs": [
+                (300000, 0.0),
+                (700000, 0.05),
+                (1000000, 0.10),
+                (1200000, 0.15),
+                (1500000, 0.20),
+                (None, 0.30),
+            ],
+        },
+        "old": {
+            "standard_deduction": 50000,
+            "rebate_limit": 500000,
+            "allows_deductions": True,
+            "section_80c_cap": 150000,
+            "section_80d_cap": 25000,          # Health insurance (self + family)
+            "section_80d_senior_cap": 50000,   # ...if the taxpayer is a senior citizen
+            "slabs": [
+                (250000, 0.0),
+                (500000, 0.05),
+                (1000000, 0.20),
+                (None, 0.30),
+            ],
+        },
+    },
+    "2026-27": {  # FY 2025-26 (Budget 2025)
+        "new": {
+            "standard_deduction": 75000,
+            "rebate_limit": 1200000,
+            "allows_deductions": False,
+            "section_80c_cap": 0,
+            "section_80d_cap": 0,
+            "section_80d_senior_cap": 0,
+            "slabs": [
+                (400000, 0.0),
+                (800000, 0.05),
+                (1200000, 0.10),
+                (1600000, 0.15),
+                (2000000, 0.20),
+                (2400000, 0.25),
+                (None, 0.30),
+            ],
+        },
+        "old": {
+            "standard_deduction": 50000,
+            "rebate_limit": 500000,
+            "allows_deductions": True,
+            "section_80c_cap": 150000,
+            "section_80d_cap": 25000,          # Health insurance (self + family)
+            "section_80d_senior_cap": 50000,   # ...if the taxpayer is a senior citizen
+            "slabs": [
+                (250000, 0.0),
+                (500000, 0.05),
+                (1000000, 0.20),
+                (None, 0.30),
+            ],
+        },
+    },
+}
+
+# --- 2. COMPILED SCHEDULES ---
+@dataclass(frozen=True)
+class TaxSchedule:
+    """
+    A slab table precompiled into breakpoint arrays.
+    lower_limits[i] is where slab i starts, base_tax[i] is the total tax
+    already due at that point, so tax = base_tax[i] + (income - lower_limits[i]) * rates[i].
+    """
+    assessment_year: str
+    regime: str
+    standard_deduction: float
+    rebate_limit: float
+    allows_deductions: bool
+    section_80c_cap: float
+    section_80d_cap: float
+    section_80d_senior_cap: float
+    lower_limits: Tuple[float, ...]
+    rates: Tuple[float, ...]
+    base_tax: Tuple[float, ...]
+
+    def taxable_income(self, gross_income, section_80c=0.0, section_80d=0.0):
+        """Gross income minus the deductions this regime allows"""
+        deductions = self.standard_deduction
+        if self.allows_deductions:
+            deductions = min(section_80c, self.section_80c_cap) + section_80d + deductions
+        return gross_income - deductions
+
+    def tax_on(self, taxable_income: float) -> float:
+        """Tax for one taxable income: binary search + one multiply-add"""
+        if taxable_income <= self.rebate_limit:
+            return 0.0
+        i = bisect_right(self.lower_limits, taxable_income) - 1
+        return self.base_tax[i] + (taxable_income - self.lower_limits[i]) * self.rates[i]
+
+    def tax_on_array(self, taxable_income):
+        """Vectorized tax_on for a NumPy array of taxable incomes"""
+        lower_limits = np.asarray(self.lower_limits)
+        i = np.searchsorted(lower_limits, taxable_income, side="right") - 1
+        i = np.maximum(i, 0)
+        tax = np.asarray(self.base_tax)[i] + (taxable_income - lower_limits[i]) * np.asarray(self.rates)[i]
+        return np.where(taxable_income <= self.rebate_limit, 0.0, tax)
+
+    def zero_tax_limit(self) -> float:
+        """Highest taxable income with no tax (the rebate limit or the end of the 0% slab)"""
+        zero_slab_end = next((lower for lower, rate in zip(self.lower_limits, self.rates) if rate > 0), 0.0)
+        return max(self.rebate_limit, zero_slab_end)
+
+    def max_income_for_tax(self, tax):
+        """
+        Inverse of tax_on for NumPy arrays: the highest taxable income whose tax is <= tax.
+        Used to find regime breakeven points without scanning incomes.
+        """
+        tax = np.asarray(tax, dtype=np.float64)
+        base_tax = np.asarray(self.base_tax)
+        rates = np.asarray(self.rates)
+        i = np.searchsorted(base_tax, tax, side="right") - 1
+        i = np.maximum(i, 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            income = np.asarray(self.lower_limits)[i] + np.where(rates[i] > 0, (tax - base_tax[i]) / rates[i], np.inf)
+        # Just above the rebate limit the tax jumps from 0 to the full slab tax
+        return np.maximum(income, self.zero_tax_limit())
+
+def compile_schedule(assessment_year, regime, table):
+    """Turns one SLAB_TABLES entry into a TaxSchedule"""
+    lower_limits, rates, base_tax = [], [], []
+    lower, running_tax = 0.0, 0.0
+    for upper, rate in table["slabs"]:
+        lower_limits.append(lower)
+        rates.append(rate)
+        base_tax.append(running_tax)
+        if upper is not None:
+            running_tax += (upper - lower) * rate
+            lower = float(upper)
+
+    return TaxSchedule(
+        assessment_year=assessment_year,
+        regime=regime,
+        standard_deduction=float(table["standard_deduction"]),
+        rebate_limit=float(table["rebate_limit"]),
+        allows_deductions=table["allows_deductions"],
+        section_80c_cap=float(table["section_80c_cap"]),
+        section_80d_cap=float(table["section_80d_cap"]),
+        section_80d_senior_cap=float(table["section_80d_senior_cap"]),
+        lower_limits=tuple(lower_limits),
+        rates=tuple(rates),
+        base_tax=tuple(base_tax),
+    )
+
+# Compiled once at import, keyed by (assessment_year, regime)
+SCHEDULES = {
+    (year, regime): compile_schedule(year, regime, table)
+    for year, regimes in SLAB_TABLES.items()
+    for regime, table in regimes.items()
+}
+
+def get_schedule(regime: str, assessment_year: Optional[str] = None) -> TaxSchedule:
+    """Looks up the compiled schedule for a regime ("new" / "old") and year"""
+    key = (assessment_year or DEFAULT_ASSESSMENT_YEAR, regime.lower())
+    if key not in SCHEDULES:
+        raise ValueError(f"No tax schedule for AY {key[0]} ({key[1]} regime)")
+    return SCHEDULES[key]
+
+def available_years():
+    """All Assessment Years in the registry, oldest first"""
+    return sorted(SLAB_TABLES)
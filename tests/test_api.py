@@ -0,0 +1,25 @@
+# tests/test_api.py
+import pytest
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+import api
+
+TAXPAYER = {"name": "Asha Rao", "pan_number": "ABCDE1234F", "age": 30, "salary_income": 900000}
+
+@pytest.fixture
+def client():
+    return TestClient(api.app)
+
+def test_key_is_required_when_configured(client, monkeypatch):
+    monkeypatch.setattr(api, "API_KEY", "s3cret")
+    assert client.get("/health").status_code == 200
+    assert client.get("/metrics").status_code == 401
+    assert client.post("/compute", json=TAXPAYER).status_code == 401
+    assert client.post("/file", json=TAXPAYER, params={"save": False}, headers={"X-API-Key": "wrong"}).status_code == 401
+    response = client.post("/compute", json=TAXPAYER, headers={"X-API-Key": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["best_regime"] in ("New", "Old")
+
+def test_no_key_configured_means_open(client, monkeypatch):
+    monkeypatch.setattr(api, "API_KEY", "")
+    assert client.post("/compute", json=TAXPAYER).status_code == 200
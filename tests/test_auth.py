@@ -0,0 +1,33 @@
+# tests/test_auth.py
+import json
+import pytest
+import auth
+
+@pytest.fixture
+def user_store(tmp_path, monkeypatch):
+    legacy = tmp_path / "users_db.json"
+    legacy.write_text(json.dumps({"admin": "admin123", **{f"user{i}": f"pass{i}" for i in range(50)}}))
+    monkeypatch.setattr(auth, "USER_DB", str(tmp_path / "users.db"))
+    monkeypatch.setattr(auth, "DB_FILE", str(legacy))
+    monkeypatch.setattr(auth, "HASH_ITERATIONS", 1000)
+    monkeypatch.setattr(auth, "_db", None)
+    yield
+    if auth._db is not None:
+        auth._db.close()
+
+def stored_iterations(username):
+    row = auth._get_db().execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
+    return int(row[0].split("$")[1])
+
+def test_legacy_users_are_upgraded_at_first_login(user_store):
+    # The import itself does no slow hashing
+    assert stored_iterations("user7") == auth.LEGACY_ITERATIONS
+
+    assert auth.check_login("user7", "wrong") is None
+    assert stored_iterations("user7") == auth.LEGACY_ITERATIONS
+
+    assert auth.check_login("user7", "pass7") == "user"
+    assert stored_iterations("user7") == auth.HASH_ITERATIONS
+    assert stored_iterations("user8") == auth.LEGACY_ITERATIONS
+    assert auth.check_login("user7", "pass7") == "user"
+    assert auth.check_login("admin", "admin123") == "admin"
@@ -0,0 +1,41 @@
+# tests/test_batch_cli.py
+import json
+import pytest
+from batch_cli import run_batch
+
+def test_malformed_jsonl_line_fails_only_that_row(tmp_path):
+    good = {"name": "Asha Rao", "pan_number": "ABCDE1234F", "age": 30, "salary_income": 900000}
+    source = tmp_path / "taxpayers.jsonl"
+    source.write_text(json.dumps(good) + "\n{not json\n[1, 2]\n" + json.dumps(good) + "\n", encoding="utf-8")
+
+    stats = run_batch(str(source), str(tmp_path / "out"), workers=0, save_to_db=False)
+
+    assert stats["processed"] == 4
+    assert stats["failed"] == 2
+    errors = [json.loads(line) for line in (tmp_path / "out" / "errors.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [e["line"] for e in errors] == [2, 3]
+    assert all(e["error"].startswith("Invalid JSON") for e in errors)
+
+def test_consecutive_runs_save_to_their_own_queue(tmp_path):
+    mongomock = pytest.importorskip("mongomock")
+    import database
+    import write_behind
+    import peer_stats
+
+    taxpayers = [{"name": f"User {i}", "pan_number": "ABCDE1234F", "age": 30, "salary_income": 900000 + i}
+                 for i in range(5)]
+    source = tmp_path / "taxpayers.jsonl"
+    source.write_text("".join(json.dumps(t) + "\n" for t in taxpayers), encoding="utf-8")
+
+    database.set_client_factory(mongomock.MongoClient)
+    app_snapshot = dict(peer_stats._snapshot)
+    try:
+        first = run_batch(str(source), str(tmp_path / "run1"), workers=0)
+        second = run_batch(str(source), str(tmp_path / "run2"), workers=0)
+        assert peer_stats._snapshot == app_snapshot  # The batch passes its snapshot along, the process-wide one is untouched
+        assert first["db_written"] == second["db_written"] == first["filed"] == 5
+        assert database.get_connection().count_documents({}) == 10
+        assert (tmp_path / "run1" / "pending_records.jsonl").read_text() == ""
+        assert not write_behind._queue or not write_behind._queue._closed  # The app's shared queue is untouched
+    finally:
+        database.set_client_factory(None)
@@ -0,0 +1,34 @@
+# tests/test_bulk_ocr.py
+# Per-file deadlines in the bulk OCR pool (the workers are forked, so a patched extractor is inherited).
+import json
+import time
+import pytest
+import bulk_ocr
+
+def fake_extract(path, timeout):
+    if "hang" in path:
+        time.sleep(600)  # Stuck in PDF rendering: no Tesseract timeout would catch this
+    return {"file": path, "pan": "ABCDE1234F", "salary": 1200000.0}
+
+@pytest.fixture(autouse=True)
+def fake_extractor(monkeypatch):
+    monkeypatch.setattr(bulk_ocr, "_extract_one", fake_extract)
+
+def test_hung_file_times_out_and_the_rest_finish(tmp_path):
+    out = tmp_path / "results.jsonl"
+    files = ["a.png", "hang.pdf", "b.png", "c.png", "d.png"]
+    start = time.monotonic()
+    results = list(bulk_ocr.bulk_extract(files, str(out), workers=2, timeout=1))
+    assert time.monotonic() - start < 30
+
+    by_name = {r["file"].rsplit("/", 1)[-1]: r for r in results}
+    assert sorted(by_name) == sorted(files)
+    assert by_name["hang.pdf"]["error"] == "Timed out after 1s"
+    assert all("error" not in r for name, r in by_name.items() if name != "hang.pdf")
+    assert len(out.read_text(encoding="utf-8").splitlines()) == len(files)
+
+def test_no_timeout_waits_for_every_file(tmp_path):
+    out = tmp_path / "results.jsonl"
+    results = list(bulk_ocr.bulk_extract(["a.png", "b.png"], str(out), workers=1, timeout=0))
+    assert [json.loads(line)["salary"] for line in out.read_text(encoding="utf-8").splitlines()] == [1200000.0] * 2
+    assert len(results) == 2
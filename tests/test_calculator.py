@@ -0,0 +1,34 @@
+# tests/test_calculator.py
+import numpy as np
+from models import TaxPayer
+from calculator import calculate_new_regime, calculate_old_regime, calculate_batch
+from tax_schedules import available_years
+
+def test_batch_matches_scalar_functions():
+    rng = np.random.default_rng(42)
+    size = 2000
+    cols = {
+        "salary_income": np.round(rng.lognormal(13.7, 0.8, size), 2),
+        "interest_income": np.where(rng.random(size) < 0.5, 0.0, rng.uniform(0, 100000, size)),
+        "section_80c_deductions": rng.uniform(0, 250000, size),
+        "section_80d_deductions": rng.uniform(0, 60000, size),
+    }
+    # Edge cases: exactly on the rebate limits and slab boundaries
+    cols["salary_income"][:6] = [0, 575000, 775000, 1275000, 1000000.5, 50000]
+    for year in available_years():
+        batch = calculate_batch(cols["salary_income"], cols["interest_income"], cols["section_80c_deductions"],
+                                cols["section_80d_deductions"], assessment_year=year)
+        for i in range(size):
+            user = TaxPayer(name="Test User", pan_number="ABCDE1234F", age=30,
+                            **{field: float(values[i]) for field, values in cols.items()})
+            tax_new, tax_old = calculate_new_regime(user, year), calculate_old_regime(user, year)
+            assert batch["tax_new"][i] == tax_new
+            assert batch["tax_old"][i] == tax_old
+            assert batch["better_regime"][i] == ("New" if tax_new < tax_old else "Old")
+
+def test_scalar_inputs_broadcast_against_arrays():
+    section_80c = np.array([0.0, 50000.0, 150000.0])
+    batch = calculate_batch(1500000, None, section_80c)
+    assert batch["tax_new"].shape == batch["tax_old"].shape == (3,)
+    assert (batch["tax_new"] == batch["tax_new"][0]).all()
+    assert batch["tax_old"][0] > batch["tax_old"][2]
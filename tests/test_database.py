@@ -0,0 +1,89 @@
+# tests/test_database.py
+# Connection handling against mongomock (no MongoDB server needed).
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+mongomock = pytest.importorskip("mongomock")
+import database
+
+class SlowPingClient(mongomock.MongoClient):
+    """mongomock client whose ping blocks until `release` is set"""
+    started = threading.Event()
+    release = threading.Event()
+
+    @property
+    def admin(self):
+        client = self
+
+        class Admin:
+            def command(self, name):
+                client.started.set()
+                assert client.release.wait(5)
+                return {"ok": 1}
+        return Admin()
+
+@pytest.fixture(autouse=True)
+def mock_client():
+    database.set_client_factory(mongomock.MongoClient)
+    yield
+    database.set_client_factory(None)
+
+def test_save_and_page_through_records():
+    start = datetime(2025, 7, 1)
+    for i in range(7):
+        assert database.save_tax_record({"name": f"User {i}", "pan": "ABCDE1234F", "status": "Generated",
+                                         "income": 1000000 + i, "tax": 1000 * i})
+    database.get_connection().update_many({}, [{"$set": {"created_at": start}}])  # Same timestamp: ties on _id
+    seen, cursor = [], None
+    while True:
+        page, cursor = database.get_records_page(cursor, page_size=3)
+        seen += [record["name"] for record in page]
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(f"User {i}" for i in range(7))
+    assert database.get_records_page(pan="ZZZZZ9999Z")[0] == []
+    stats = database.get_dashboard_stats(date_from=start, date_to=start + timedelta(days=1))
+    assert stats["totals"]["filings"] == 7
+
+def test_failed_connection_backs_off_without_retrying():
+    calls = []
+    def broken_factory():
+        calls.append(1)
+        raise ConnectionError("no server")
+    database.set_client_factory(broken_factory)
+    assert database.get_connection() is None
+    assert database.get_connection() is None  # Within the backoff: not even attempted
+    assert len(calls) == 1
+    assert database.get_pool_stats()["consecutive_failures"] == 1
+
+def test_slow_ping_does_not_block_other_callers(monkeypatch):
+    SlowPingClient.started.clear()
+    SlowPingClient.release.clear()
+    database.set_client_factory(SlowPingClient)
+    first = {}
+    checker = threading.Thread(target=lambda: first.setdefault("collection", database.get_connection()))
+    checker.start()
+    assert SlowPingClient.started.wait(5)
+
+    # First connection still being checked: others get "unknown = down" immediately instead of waiting
+    start = time.perf_counter()
+    assert database.get_connection() is None
+    assert time.perf_counter() - start < 0.1
+
+    SlowPingClient.release.set()
+    checker.join(5)
+    assert first["collection"] is not None
+
+    # Health check due again: while it runs, others keep using the connection that was up
+    monkeypatch.setitem(database._health, "healthy_until", 0.0)
+    SlowPingClient.started.clear()
+    SlowPingClient.release.clear()
+    checker = threading.Thread(target=database.get_connection)
+    checker.start()
+    assert SlowPingClient.started.wait(5)
+    start = time.perf_counter()
+    assert database.get_connection() is not None
+    assert time.perf_counter() - start < 0.1
+    SlowPingClient.release.set()
+    checker.join(5)
@@ -0,0 +1,39 @@
+# tests/test_field_extractor.py
+from field_extractor import extract_fields, best_fields
+
+def test_amount_on_the_next_line():
+    fields = best_fields(extract_fields("1. Gross Salary\n   12,34,567\n2. Standard deduction 75,000"))
+    assert fields["salary_income"] == 1234567
+    assert fields["standard_deduction"] == 75000
+
+def test_next_line_label_keeps_its_own_amount():
+    fields = best_fields(extract_fields("1. Gross Salary\n2. Standard deduction 75,000"))
+    assert "salary_income" not in fields
+    assert fields["standard_deduction"] == 75000
+
+PART_B = """PART B (Annexure)
+Details of Salary Paid and any other income and tax deducted
+1. Gross Salary
+(a) Salary as per provisions contained in section 17(1)            12,00,000.00
+(b) Value of perquisites under section 17(2)                              0.00
+(c) Profits in lieu of salary under section 17(3)                         0.00
+(d) Total                                                         12,00,000.00
+2. Less: Allowance to the extent exempt under section 10                 0.00
+3. Total amount of salary received from current employer          12,00,000.00
+4. Less: Deductions under section 16
+(a) Standard deduction under section 16(ia)                          50,000.00
+5. Income chargeable under the head "Salaries"                    11,50,000.00
+6. Add: Any other income reported by the employee
+(a) Income from house property                                            0.00
+7. Gross total income                                             11,50,000.00
+8. Deductions under Chapter VI-A
+(a) Deduction in respect of life insurance premia, contributions to PF etc. under section 80C   1,50,000.00
+"""
+
+def test_part_b_gross_salary_is_not_the_chargeable_income():
+    fields = best_fields(extract_fields(PART_B))
+    assert fields["salary_income"] == 1200000
+    assert fields["standard_deduction"] == 50000
+    assert fields["income_chargeable_salaries"] == 1150000
+    assert fields["gross_total_income"] == 1150000
+    assert fields["section_80c_deductions"] == 150000
@@ -0,0 +1,53 @@
+# tests/test_peer_stats.py
+# Peer statistics against mongomock, and the auditor's anomaly rule on top of them.
+import pytest
+mongomock = pytest.importorskip("mongomock")
+import database
+from models import TaxPayer
+from auditor import audit_tax_return
+from peer_stats import MIN_PEERS, PEER_STATS_COLLECTION, PeerStats, load_peer_stats, peer_group, record_peer_stats, \
+    rebuild_peer_stats
+
+@pytest.fixture
+def collection():
+    database.set_client_factory(mongomock.MongoClient)
+    yield database.get_connection()
+    database.set_client_factory(None)
+
+def peer_records(count):
+    # Same income / age group, 80C between 10% and 12% of income
+    return [{"income": 1200000.0, "age": 35, "section_80c": 120000.0 + 1000 * (i % 25), "section_80d": 0.0}
+            for i in range(count)]
+
+def test_saves_accumulate_per_group(collection):
+    assert record_peer_stats(peer_records(20), collection) == 20
+    assert record_peer_stats(peer_records(20) + [{"income": 0, "age": 35}], collection) == 20  # Ungroupable: skipped
+    doc = collection.database[PEER_STATS_COLLECTION].find_one({"_id": peer_group(1200000, 35)})
+    assert doc["n"] == 40
+    assert doc["deduction_ratio"]["sum"] == pytest.approx(sum(r["section_80c"] / 1200000 for r in peer_records(20)) * 2)
+
+def test_rebuild_matches_incremental_counts(collection):
+    records = peer_records(MIN_PEERS + 10)
+    collection.insert_many([dict(r) for r in records])
+    record_peer_stats(records, collection)
+    incremental = load_peer_stats().groups
+
+    assert rebuild_peer_stats(collection) == len(records)
+    rebuilt = load_peer_stats().groups
+    assert rebuilt.keys() == incremental.keys()
+    for name, (mean, std) in incremental[peer_group(1200000, 35)].items():
+        assert rebuilt[peer_group(1200000, 35)][name] == pytest.approx((mean, std))
+
+def test_anomaly_rule_only_runs_with_a_snapshot(collection):
+    record_peer_stats(peer_records(MIN_PEERS + 10), collection)
+    peers = load_peer_stats()
+    outlier = TaxPayer(name="Ravi", pan_number="ABCDE1234F", age=35, salary_income=1200000,
+                       section_80c_deductions=150000, section_80d_deductions=100000)
+    summary = {"better_regime": "Old"}
+
+    flagged = audit_tax_return(outlier, summary, peers)
+    assert any("far above other taxpayers" in flag for flag in flagged["flags"])
+    unscored = audit_tax_return(outlier, summary)
+    assert not any("far above other taxpayers" in flag for flag in unscored["flags"])
+    assert flagged["risk_score"] == unscored["risk_score"] + 25
+    assert audit_tax_return(outlier, summary, PeerStats()) == unscored  # Empty snapshot = no peers to compare with
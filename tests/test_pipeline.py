@@ -0,0 +1,23 @@
+# tests/test_pipeline.py
+import json
+import numpy as np
+from models import TaxPayer
+from pipeline import process_return
+from tax_schedules import get_schedule
+
+def test_itr_json_matches_the_computed_tax():
+    rng = np.random.default_rng(7)
+    for _ in range(300):
+        user = TaxPayer(name="Test User", pan_number="ABCDE1234F", age=int(rng.integers(21, 85)),
+                        salary_income=float(rng.uniform(3e5, 4e6)), interest_income=float(rng.choice([0, 25000])),
+                        section_80c_deductions=float(rng.uniform(0, 2.5e5)), section_80d_deductions=float(rng.uniform(0, 6e4)))
+        result = process_return(user)
+        itr = json.loads(result["itr_json"])
+        schedule = get_schedule(result["best_regime"])
+        assert schedule.tax_on(itr["income_details"]["net_taxable_income"]) == result["final_tax"]
+        deductions = itr["deductions"]
+        assert deductions["total_deductions"] == deductions["section_80c"] + deductions["section_80d"]
+        if result["best_regime"] == "New":
+            assert deductions["total_deductions"] == 0
+        else:
+            assert deductions["section_80c"] <= schedule.section_80c_cap
@@ -0,0 +1,91 @@
+# tests/test_write_behind.py
+# Write-behind queue against mongomock: outages, restarts and replays.
+import pytest
+mongomock = pytest.importorskip("mongomock")
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from write_behind import WriteBehindQueue
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient().sahaj_tax_db.user_records
+
+def make_queue(spill_file, get_collection):
+    # Long interval: the tests flush explicitly, the background worker stays idle
+    return WriteBehindQueue(spill_file=str(spill_file), flush_interval=3600, get_collection=get_collection)
+
+def records(count):
+    return [{"name": f"User {i}", "pan": "ABCDE1234F", "income": 1000000.0, "tax": 1000.0} for i in range(count)]
+
+def spilled(spill_file):
+    return spill_file.read_text(encoding="utf-8").splitlines()
+
+def test_outage_then_recovery(tmp_path, collection):
+    server = {"up": False}
+    spill_file = tmp_path / "pending.jsonl"
+    queue = make_queue(spill_file, lambda: collection if server["up"] else None)
+    for record in records(5):
+        queue.put(record)
+
+    assert queue.flush() == 0  # MongoDB down: everything stays pending and on disk
+    assert queue.pending() == 5
+    assert len(spilled(spill_file)) == 5
+
+    server["up"] = True
+    assert queue.flush() == 5
+    assert queue.pending() == 0
+    assert collection.count_documents({}) == 5
+    assert spilled(spill_file) == []
+    queue.close()
+
+def test_restart_replays_the_spill_file(tmp_path, collection):
+    spill_file = tmp_path / "pending.jsonl"
+    queue = make_queue(spill_file, lambda: None)
+    for record in records(3):
+        queue.put(record)
+    queue.close()  # Shut down while MongoDB is still down
+
+    restarted = make_queue(spill_file, lambda: collection)
+    assert restarted.pending() == 3
+    assert restarted.flush() == 3
+    assert sorted(doc["name"] for doc in collection.find()) == ["User 0", "User 1", "User 2"]
+    restarted.close()
+
+def test_replayed_records_are_not_duplicated(tmp_path, collection):
+    # A crash after insert_many but before the spill file was rewritten: the replay hits duplicate keys
+    spill_file = tmp_path / "pending.jsonl"
+    queue = make_queue(spill_file, lambda: collection)
+    batch = records(4)
+    for record in batch:
+        queue.put(record)
+    collection.insert_many([dict(record) for record in batch[:2]])
+
+    assert queue.flush() == 4
+    assert queue.pending() == 0
+    assert collection.count_documents({}) == 4
+    queue.close()
+
+def test_real_write_errors_keep_records_pending(tmp_path, collection):
+    class FailingCollection:
+        database = collection.database
+
+        def insert_many(self, documents, ordered=True):
+            raise BulkWriteError({"writeErrors": [{"index": 0, "code": 121, "errmsg": "Document failed validation"}],
+                                  "nInserted": 0})
+
+    spill_file = tmp_path / "pending.jsonl"
+    queue = make_queue(spill_file, lambda: FailingCollection())
+    for record in records(2):
+        queue.put(record)
+    assert queue.flush() == 0
+    assert queue.pending() == 2
+    assert queue.stats["failed_flushes"] == 1
+    assert len(spilled(spill_file)) == 2
+    queue.close()
+
+def test_put_assigns_ids_before_spilling(tmp_path):
+    queue = make_queue(tmp_path / "pending.jsonl", lambda: None)
+    record = records(1)[0]
+    queue.put(record)
+    assert isinstance(record["_id"], ObjectId)
+    queue.close()
@@ -0,0 +1,81 @@
+# whatif.py
+# Instant "what if" answers for the filing wizard.
+# Scenarios are keyed on the normalized numeric TaxPayer fields (rounded to
+# the rupee), so moving a slider back and forth is served from an LRU cache
+# instead of re-running the calculators. Tax curves (tax vs. salary / 80C / 80D)
+# are computed for both regimes in one vectorized call.
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from calculator import calculate_batch
+from optimizer import optimize_batch
+from tax_schedules import DEFAULT_ASSESSMENT_YEAR, get_schedule
+
+CACHE_SIZE = 1024
+CURVE_POINTS = 121
+# Inputs a curve can vary: TaxPayer field -> chart label
+CURVE_FIELDS = {
+    "salary_income": "Gross Annual Salary (₹)",
+    "section_80c_deductions": "80C Deductions (₹)",
+    "section_80d_deductions": "Health Insurance (₹)",
+}
+
+def scenario_key(user):
+    """(salary, interest, 80C, 80D, age) rounded to whole rupees; name and PAN don't change the tax"""
+    return (round(user.salary_income), round(user.interest_income), round(user.section_80c_deductions),
+            round(user.section_80d_deductions), int(user.age))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _evaluate(key, assessment_year):
+    salary, interest, section_80c, section_80d, age = key
+    plan = optimize_batch([salary], [interest], [section_80c], [section_80d], [age], None, assessment_year)
+    tax_new, tax_old = plan["tax_new"][0].item(), plan["tax_old"][0].item()
+    return {
+        "tax_new": tax_new,
+        "tax_old": tax_old,
+        "best_regime": "New" if tax_new < tax_old else "Old",
+        "final_tax": min(tax_new, tax_old),
+        "optimized_tax": plan["tax"][0].item(),
+        "optimized_regime": str(plan["regime"][0]),
+    }
+
+def evaluate_scenario(user, assessment_year=None):
+    """Both regimes, the recommendation and the optimizer's best case for one scenario (cached)"""
+    return dict(_evaluate(scenario_key(user), assessment_year or DEFAULT_ASSESSMENT_YEAR))
+
+def curve_range(user, field, assessment_year=None):
+    """Sensible (start, stop) for a curve around the user's current value"""
+    schedule = get_schedule("old", assessment_year)
+    if field == "section_80c_deductions":
+        return 0.0, schedule.section_80c_cap
+    if field == "section_80d_deductions":
+        return 0.0, schedule.section_80d_senior_cap
+    return 0.0, max(2 * user.salary_income, 3000000.0)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _curve(key, field, start, stop, points, assessment_year):
+    values = dict(zip(("salary_income", "interest_income", "section_80c_deductions", "section_80d_deductions"), key))
+    axis = np.linspace(start, stop, points)
+    values[field] = axis
+    result = calculate_batch(values["salary_income"], values["interest_income"], values["section_80c_deductions"],
+                             values["section_80d_deductions"], assessment_year)
+    return pd.DataFrame({"New Regime": result["tax_new"], "Old Regime": result["tax_old"]},
+                        index=pd.Index(axis, name=CURVE_FIELDS[field]))
+
+def tax_curve(user, field="salary_income", start=None, stop=None, points=CURVE_POINTS, assessment_year=None):
+    """
+    Tax in both regimes as one input varies and everything else stays as entered.
+    Returns a DataFrame indexed by the input value (ready for st.line_chart).
+    """
+    if field not in CURVE_FIELDS:
+        raise ValueError(f"Cannot vary {field}; choose one of {', '.join(CURVE_FIELDS)}")
+    default_start, default_stop = curve_range(user, field, assessment_year)
+    start = default_start if start is None else start
+    stop = default_stop if stop is None else stop
+    curve = _curve(scenario_key(user), field, float(start), float(stop), points,
+                   assessment_year or DEFAULT_ASSESSMENT_YEAR)
+    return curve.copy()  # The cached frame must not be modified by callers
+
+def cache_info():
+    """Hit / miss counters of the scenario and curve caches"""
+    return {"scenarios": _evaluate.cache_info()._asdict(), "curves": _curve.cache_info()._asdict()}
@@ -0,0 +1,193 @@
+# write_behind.py
+# Buffered ingestion for tax records.
+# "Process Application" only appends the record to a local spill file and an
+# in-memory buffer; a background thread writes them to MongoDB in batches
+# (insert_many), flushed by size or time. If MongoDB is down, records stay in
+# the spill file and are retried later, even across restarts.
+# The spill file belongs to ONE process: flushes rewrite it in place, so two
+# processes sharing it can lose or double-save records. Multi-process servers
+# (uvicorn --workers, see api.py) save records directly instead.
+import atexit
+import os
+import threading
+from datetime import datetime
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+import database
+from peer_stats import record_peer_stats
+from metrics import span, increment
+
+SPILL_FILE = "pending_records.jsonl"
+BATCH_SIZE = 500        # Flush as soon as this many records are waiting...
+FLUSH_INTERVAL = 2.0    # ...or every this many seconds
+FSYNC_SPILL = False     # True = fsync every record (survives power loss, costs a disk sync per record)
+DUPLICATE_KEY = 11000
+
+class WriteBehindQueue:
+    """
+    Batches records into insert_many calls from a background worker thread.
+    Every record gets its _id before it is spilled, so re-sending a batch after
+    a crash or a partial failure never creates duplicates.
+    """
+
+    def __init__(self, spill_file=SPILL_FILE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 get_collection=database.get_connection):
+        self.spill_file = spill_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.get_collection = get_collection
+        self.stats = {"queued": 0, "written": 0, "failed_flushes": 0}
+
+        self._lock = threading.Lock()         # Guards _pending and the spill file
+        self._flush_lock = threading.Lock()   # Only one flush at a time
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        # Records left over from a previous run (Mongo outage or crash) go first
+        self._pending = self._read_spill()
+        self._spill = open(self.spill_file, "a", encoding="utf-8")
+
+        self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._worker.start()
+
+    def _read_spill(self):
+        if not os.path.exists(self.spill_file):
+            return []
+        records = []
+        with open(self.spill_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json_util.loads(line))
+                except ValueError:
+                    pass  # Half-written last line from a crash
+        return records
+
+    def _rewrite_spill(self):
+        """Replaces the spill file with what is still pending (call with _lock held)"""
+        self._spill.close()
+        tmp_file = self.spill_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            for record in self._pending:
+                f.write(json_util.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.spill_file)
+        self._spill = open(self.spill_file, "a", encoding="utf-8")
+
+    def put(self, record):
+        """Queues one record. Returns immediately; never talks to MongoDB."""
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        record.setdefault("_id", ObjectId())
+        record.setdefault("created_at", datetime.now())
+        line = json_util.dumps(record) + "\n"
+        with self._lock:
+            self._spill.write(line)
+            self._spill.flush()
+            if FSYNC_SPILL:
+                os.fsync(self._spill.fileno())
+            self._pending.append(record)
+            self.stats["queued"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+
+    def pending(self):
+        """Number of records not yet confirmed by MongoDB"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Writes everything pending to MongoDB. Returns how many records were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+            if not batch:
+                return 0
+            collection = self.get_collection()
+            if collection is None:
+                self.stats["failed_flushes"] += 1
+                return 0
+
+            written, inserted_records = 0, []
+            for start in range(0, len(batch), self.batch_size):
+                chunk = batch[start:start + self.batch_size]
+                inserted = chunk
+                try:
+                    with span("db.insert_many"):
+                        collection.insert_many(chunk, ordered=False)
+                except BulkWriteError as e:
+                    # Duplicate keys = already written by an earlier attempt; anything else is a real failure
+                    if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                        database.report_failure()
+                        self.stats["failed_flushes"] += 1
+                        break
+                    duplicates = {err["index"] for err in e.details["writeErrors"]}
+                    inserted = [record for i, record in enumerate(chunk) if i not in duplicates]
+                except PyMongoError:
+                    database.report_failure()
+                    self.stats["failed_flushes"] += 1
+                    break
+                written += len(chunk)
+                inserted_records.extend(inserted)
+
+            if written:
+                with self._lock:
+                    # put() only appends, so the written records are still at the front
+                    del self._pending[:written]
+                    self._rewrite_spill()
+                    self.stats["written"] += written
+                increment("db.records_written", written)
+            if inserted_records:
+                # Only records this flush inserted are counted, so a retried batch is never counted twice.
+                # If the process died between an insert_many and this upsert, the re-sent records come
+                # back as duplicates and stay uncounted; rebuild_peer_stats() repairs that drift.
+                try:
+                    record_peer_stats(inserted_records, collection)
+                except Exception as e:
+                    print(f"Peer Stats Warning: {e}")
+            return written
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # The worker must never die; records stay pending and are retried
+                print(f"Write-behind Warning: {e}")
+
+    def close(self, timeout=10):
+        """Stops the worker and does a final flush (call on shutdown)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._worker.join(timeout)
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._spill.close()
+
+# --- SHARED QUEUE (one per process) ---
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_queue():
+    """Returns the process-wide queue, starting it on first use"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue()
+            atexit.register(_queue.close)
+        return _queue
+
+def queue_tax_record(data):
+    """Non-blocking replacement for database.save_tax_record"""
+    get_queue().put(data)
+    return True
+
+def flush_pending_records():
+    """Explicit flush, e.g. before shutdown. Returns how many records were written."""
+    return get_queue().flush()